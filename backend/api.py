@@ -3,71 +3,287 @@ API backend for the Agentic AI Tutor, replacing the Gradio UI.
 This exposes the core functionality via REST endpoints for a React frontend.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import hmac
+import os
 import random
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from typing import AsyncIterator, ClassVar, NamedTuple
 
-from src.tutor.interface import tutor_interface
+import numpy as np
+import orjson
 
 # Game state management
+@dataclass(slots=True)
 class GameState:
-    def __init__(self):
-        self.coins = 100  # Starting coins
-        self.total_coins_earned = 100
-        self.streak_days = 0
-        self.quizzes_completed = 0
-        self.videos_watched = 0
-        self.current_level = 1
-        self.unlocked_perks = []
-        self.daily_progress = {"videos": 0, "quizzes": 0, "study_time": 0}
-        self.attention_score = 100
-        self.parent_authenticated = False
+    coins: int = 100  # Starting coins
+    total_coins_earned: int = 100
+    streak_days: int = 0
+    quizzes_completed: int = 0
+    videos_watched: int = 0
+    current_level: int = 1
+    unlocked_perks: list[str] = field(default_factory=list)
+    daily_videos: int = 0
+    daily_quizzes: int = 0
+    daily_study_time: int = 0
+    attention_score: int = 100
+    parent_authenticated: bool = False
+    # Changes across all states; the session flusher writes to disk only when this moves
+    _changes: ClassVar[int] = 0
+    
+    def touch(self):
+        """Marks the state as changed, scheduling a session flush."""
+        GameState._changes += 1
         
     def add_coins(self, amount):
         self.coins += amount
         self.total_coins_earned += amount
+        self.touch()
         
     def spend_coins(self, amount):
         if self.coins >= amount:
             self.coins -= amount
+            self.touch()
             return True
         return False
 
-# Global game state
-game_state = GameState()
+# Per-browser game state, keyed by a session cookie so students don't share coins
+SESSION_COOKIE = "tutor_session"
+SESSION_TTL_SECONDS = 24 * 60 * 60
+# Sessions are written behind, batching every change within the interval into one write
+SESSION_STORE_PATH = os.environ.get("SESSION_STORE_PATH", "data/cache/sessions.json")
+SESSION_FLUSH_SECONDS = 0.5
+_PERSISTED_FIELDS = tuple(f.name for f in fields(GameState) if not f.name.startswith("_"))
+
+def _copy_field(value):
+    # Lists (unlocked_perks) are copied so later appends don't leak into a snapshot
+    return list(value) if isinstance(value, list) else value
+
+class SessionStore:
+    """Game states by session id; idle sessions expire and the oldest are dropped past max_sessions."""
+    
+    def __init__(self, max_sessions: int = 10_000, ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # session id -> (last used, state), least recently used first
+        self._sessions: OrderedDict[str, tuple[float, GameState]] = OrderedDict()
+    
+    def get(self, session_id: str | None) -> GameState | None:
+        entry = self._sessions.get(session_id) if session_id else None
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry[0] > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        self._sessions[session_id] = (now, entry[1])
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+    
+    def create(self) -> tuple[str, GameState]:
+        session_id, state = secrets.token_urlsafe(16), GameState()
+        state.touch()
+        now = time.monotonic()
+        self._sessions[session_id] = (now, state)
+        # Least recently used sessions sit at the front, so expired ones are trimmed from there
+        while self._sessions:
+            oldest_id, (last_used, _) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_used <= self.ttl_seconds:
+                break
+            del self._sessions[oldest_id]
+        return session_id, state
+    
+    def snapshot(self) -> dict[str, dict]:
+        """Copies every session's fields for save().
+        
+        Call it on the event loop, where states are mutated, so no copy catches a
+        half-applied update; save() can then run in a worker thread.
+        """
+        offset = time.time() - time.monotonic()
+        return {
+            session_id: {
+                "last_used": last_used + offset,
+                "state": {name: _copy_field(getattr(state, name)) for name in _PERSISTED_FIELDS},
+            }
+            for session_id, (last_used, state) in self._sessions.items()
+        }
+    
+    @staticmethod
+    def save(path: str, snapshot: dict[str, dict]):
+        """Writes a snapshot atomically, so a crash mid-write leaves the previous file intact."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(snapshot))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def load(self, path: str):
+        """Restores sessions written by save(), skipping expired ones."""
+        try:
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Error loading sessions: {e}")
+            return
+        
+        if not isinstance(data, dict):
+            print(f"Error loading sessions: expected an object in {path}")
+            return
+        
+        offset = time.monotonic() - time.time()
+        now = time.monotonic()
+        sessions = []
+        for session_id, entry in data.items():
+            try:
+                last_used = float(entry["last_used"]) + offset
+                state = GameState(**{name: value for name, value in entry["state"].items() if name in _PERSISTED_FIELDS})
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                print(f"Skipping unreadable session {session_id}: {e!r}")
+                continue
+            if now - last_used <= self.ttl_seconds:
+                sessions.append((last_used, session_id, state))
+        for last_used, session_id, state in sorted(sessions, key=lambda session: session[0]):
+            self._sessions[session_id] = (last_used, state)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+SESSIONS = SessionStore()
+
+def _start_session(response: Response) -> GameState:
+    session_id, state = SESSIONS.create()
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_TTL_SECONDS, httponly=True, samesite="lax")
+    return state
+
+async def get_game_state(request: Request, response: Response) -> GameState:
+    """Returns this browser's game state, starting a new session on first visit or after expiry."""
+    state = SESSIONS.get(request.cookies.get(SESSION_COOKIE))
+    return state if state is not None else _start_session(response)
+
+# One random generator per worker thread, so concurrent requests don't share the global one
+_thread_local = threading.local()
+
+def _rng() -> random.Random:
+    rng = getattr(_thread_local, "rng", None)
+    if rng is None:
+        rng = _thread_local.rng = random.Random()
+    return rng
+
+# Request queueing for LLM-backed endpoints
+class RequestQueue:
+    """Caps how many LLM calls run at once and how many may wait; rejects the rest with 503.
+    
+    Waiting happens on the event loop, so queued requests don't hold worker threads.
+    """
+    
+    def __init__(self, concurrency_limit: int, max_size: int):
+        self.concurrency_limit = concurrency_limit
+        self.max_size = max_size
+        self._slots = asyncio.Semaphore(concurrency_limit)
+        self._pending = 0
+    
+    @asynccontextmanager
+    async def slot(self):
+        if self._pending >= self.concurrency_limit + self.max_size:
+            raise HTTPException(status_code=503, detail="⏳ The AI Tutor is very busy right now. Please try again in a moment!")
+        self._pending += 1
+        try:
+            async with self._slots:
+                yield
+        finally:
+            self._pending -= 1
+
+# Roadmaps and quizzes are long generations; chat replies are shorter
+GENERATION_QUEUE = RequestQueue(concurrency_limit=2, max_size=64)
+CHAT_QUEUE = RequestQueue(concurrency_limit=4, max_size=64)
+MAX_CHAT_BATCH_SIZE = 8
+# Drafts shorter than this aren't worth an embedding call
+CHAT_PREFETCH_MIN_CHARS = 8
+# Threads for blocking tutor work (asyncio.to_thread); bounded so a burst can't spawn one per request
+BLOCKING_WORKERS = 16
 
 # AI Tutor Initialization
-try:
-    tutor_ready = tutor_interface.retriever is not None
-    print(f"🤖 AI Tutor System: {'✅ Ready' if tutor_ready else '❌ Not Ready'}")
-except Exception as e:
-    print(f"AI Tutor Initialization Error: {e}")
-    tutor_ready = False
-
-# Sample video content
+# The tutor pulls in LangChain, FAISS and the vector store, so it is imported on
+# first use instead of at module load, and warmed up in a background thread
+# once the server starts.
+_tutor = None
+_tutor_lock = threading.Lock()
+
+def get_tutor():
+    """Returns the AI tutor, importing and initializing it on first use."""
+    global _tutor
+    if _tutor is None:
+        with _tutor_lock:
+            if _tutor is None:
+                from src.tutor.interface import tutor_interface
+                _tutor = tutor_interface
+    return _tutor
+
+def is_tutor_ready() -> bool:
+    """Whether the tutor has a vector store loaded; waits for initialization if it is still running."""
+    try:
+        return get_tutor().retriever is not None
+    except Exception as e:
+        print(f"AI Tutor Initialization Error: {e}")
+        return False
+
+def _warm_up_tutor():
+    """Loads the tutor and runs a first retrieval, so the first student request doesn't pay for it."""
+    if is_tutor_ready():
+        get_tutor().warm_up()
+
+# Sample video content (read-only, so stored as tuples of named tuples)
+class Video(NamedTuple):
+    title: str
+    duration: str
+    url: str
+
 SAMPLE_VIDEOS = {
-    "Math": [
-        {"title": "Fun with Fractions! 🥧", "duration": "15:30", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Multiplication Magic ✨", "duration": "12:45", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Geometry Adventures 📐", "duration": "18:20", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"}
-    ],
-    "Science": [
-        {"title": "Amazing Animals 🦁", "duration": "16:15", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Space Exploration 🚀", "duration": "14:30", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Plant Life Cycle 🌱", "duration": "13:45", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"}
-    ],
-    "Social Studies": [
-        {"title": "Indian History Heroes 🇮🇳", "duration": "17:00", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Geography Fun 🗺️", "duration": "15:20", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Culture & Traditions 🎭", "duration": "16:40", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"}
-    ],
-    "English": [
-        {"title": "Story Time Adventures 📚", "duration": "14:15", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Grammar Made Easy 📝", "duration": "12:30", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"},
-        {"title": "Poetry Corner 🎵", "duration": "11:45", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"}
-    ]
+    "Math": (
+        Video("Fun with Fractions! 🥧", "15:30", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Multiplication Magic ✨", "12:45", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Geometry Adventures 📐", "18:20", "https://www.youtube.com/embed/dQw4w9WgXcQ")
+    ),
+    "Science": (
+        Video("Amazing Animals 🦁", "16:15", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Space Exploration 🚀", "14:30", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Plant Life Cycle 🌱", "13:45", "https://www.youtube.com/embed/dQw4w9WgXcQ")
+    ),
+    "Social Studies": (
+        Video("Indian History Heroes 🇮🇳", "17:00", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Geography Fun 🗺️", "15:20", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Culture & Traditions 🎭", "16:40", "https://www.youtube.com/embed/dQw4w9WgXcQ")
+    ),
+    "English": (
+        Video("Story Time Adventures 📚", "14:15", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Grammar Made Easy 📝", "12:30", "https://www.youtube.com/embed/dQw4w9WgXcQ"),
+        Video("Poetry Corner 🎵", "11:45", "https://www.youtube.com/embed/dQw4w9WgXcQ")
+    ),
+}
+
+DEFAULT_VIDEO = Video("Sample Video 📺", "15:00", "https://www.youtube.com/embed/dQw4w9WgXcQ")
+
+# The whole catalogue as JSON-ready data, so clients can pick videos without a round trip
+VIDEO_CATALOGUE = {
+    "videos": {subject: [video._asdict() for video in videos] for subject, videos in SAMPLE_VIDEOS.items()},
+    "default": DEFAULT_VIDEO._asdict(),
 }
 
 PERKS_SHOP = [
@@ -79,6 +295,41 @@ PERKS_SHOP = [
     {"name": "Music Mode 🎵", "cost": 60, "description": "Study with background music!"}
 ]
 
+# Parallel lookups for purchases; PERKS_SHOP stays the display form
+_PERK_NAMES = tuple(perk["name"] for perk in PERKS_SHOP)
+_PERK_COSTS = tuple(perk["cost"] for perk in PERKS_SHOP)
+
+# Canned chat replies for when the AI API fails, keyed by the normalized message
+FALLBACK_CHAT_TEMPLATES = {
+    "hello": "Hello! I'm your AI tutor for {subject}. How can I help you learn today? 🤖",
+    "hi": "Hi there! Ready to explore {subject}? What would you like to learn? 📚",
+    "help": "I'm here to help you with {subject}! You can ask me questions about concepts, problems, or explanations. What specific topic interests you?",
+}
+FALLBACK_CHAT_GENERIC = "I understand you're asking about '{message}' in {subject}. While I'm having some connection issues with the advanced AI right now, I can still help! Could you be more specific about what you'd like to learn? 🎓"
+
+# Quiz rewards: a percentage at or above QUIZ_SCORE_THRESHOLDS[i] earns QUIZ_SCORE_TIERS[i + 1]
+QUIZ_SCORE_THRESHOLDS = (40, 60, 80)
+QUIZ_SCORE_TIERS = (
+    (10, "💪", "Keep practicing! You'll get better!"),
+    (20, "👍", "Good effort! Try again to improve!"),
+    (30, "👏", "Great job! Keep it up!"),
+    (50, "🎉", "Amazing! You're a superstar!"),
+)
+
+# Only a digest of the parent PIN is kept; PARENT_PIN overrides the default
+_PARENT_PIN_HASH = hashlib.sha256(os.environ.get("PARENT_PIN", "1234").encode()).digest()
+
+def verify_parent_pin(pin: str) -> bool:
+    """Checks a PIN in constant time, so response timing reveals nothing about it."""
+    return hmac.compare_digest(hashlib.sha256(pin.encode()).digest(), _PARENT_PIN_HASH)
+
+SOCRATIC_QUESTIONS = [
+    "Hey there! 👋 What was the last thing you learned?",
+    "Quick check! 🧠 Can you tell me one interesting fact from the video?",
+    "Stay focused! 💪 What do you think happens next?",
+    "Attention buddy! 👀 What's your favorite part so far?"
+]
+
 # Pydantic models for requests
 class ParentPinRequest(BaseModel):
     pin: str
@@ -107,8 +358,70 @@ class ChatRequest(BaseModel):
     subject: str
     grade: str
 
+class ChatBatchRequest(BaseModel):
+    requests: list[ChatRequest]
+
 # FastAPI app
-app = FastAPI(title="Agentic AI Tutor API")
+class ORJSONResponse(JSONResponse):
+    """JSON responses serialized by orjson, which is several times faster than the stdlib encoder."""
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+def _cached_json(request: Request, response: Response, payload, max_age: int, scope: str = "private") -> Response:
+    """Serializes payload with Cache-Control and an ETag; answers 304 when the client's copy is current."""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    # Headers already set on the injected response (e.g. a new session cookie) are kept
+    response.headers["Cache-Control"] = f"{scope}, max-age={max_age}"
+    response.headers["ETag"] = etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=response.headers)
+    return Response(body, media_type="application/json", headers=response.headers)
+
+# DEBUG=1 enables tracebacks in responses, auto-reload and per-request access logs
+DEBUG = os.environ.get("DEBUG") == "1"
+
+# One save at a time: a flush still running in a worker thread and the shutdown save share the .tmp file
+_SESSION_SAVE_LOCK = threading.Lock()
+
+def _save_sessions(snapshot: dict[str, dict] | None = None):
+    try:
+        with _SESSION_SAVE_LOCK:
+            SessionStore.save(SESSION_STORE_PATH, SESSIONS.snapshot() if snapshot is None else snapshot)
+    except OSError as e:
+        print(f"Error saving sessions: {e}")
+
+async def _flush_sessions():
+    """Write-behind: persists the sessions at most every SESSION_FLUSH_SECONDS, and only after a change."""
+    flushed = GameState._changes
+    while True:
+        await asyncio.sleep(SESSION_FLUSH_SECONDS)
+        if GameState._changes != flushed:
+            flushed = GameState._changes
+            # Copy on the event loop, where states are mutated; serialize and fsync off it
+            await asyncio.to_thread(_save_sessions, SESSIONS.snapshot())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="tutor-blocking"))
+    SESSIONS.load(SESSION_STORE_PATH)
+    flusher = asyncio.create_task(_flush_sessions())
+    # Start serving right away; the tutor loads while the first page renders
+    threading.Thread(target=_warm_up_tutor, daemon=True).start()
+    yield
+    flusher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await flusher
+    # Cancelling doesn't stop a save already running in its thread; the lock makes this final save land last
+    _save_sessions()
+    if _tutor is not None:
+        _tutor.close()
+        await _tutor.aclose()
+        _tutor.save_response_cache()
+
+app = FastAPI(title="Agentic AI Tutor API", debug=DEBUG, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -120,43 +433,52 @@ app.add_middleware(
 )
 
 @app.get("/health")
-def health_check():
-    return {"status": "ok", "tutor_ready": tutor_ready}
+async def health_check(request: Request, response: Response):
+    # Never block the health check on the background warm-up
+    tutor_loading = _tutor is None or not _tutor.retriever_loaded
+    tutor_ready = not tutor_loading and _tutor.retriever is not None
+    return _cached_json(request, response, {"status": "ok", "tutor_ready": tutor_ready, "tutor_loading": tutor_loading}, max_age=5, scope="public")
+
+@app.post("/start_session")
+async def api_start_session(response: Response):
+    """Starts a fresh game (new coins, progress and parent login) for this browser."""
+    state = _start_session(response)
+    return {"coins": state.coins}
 
 @app.post("/verify_parent")
-def api_verify_parent(req: ParentPinRequest):
-    if req.pin == "1234":
+async def api_verify_parent(req: ParentPinRequest, game_state: GameState = Depends(get_game_state)):
+    if verify_parent_pin(req.pin):
         game_state.parent_authenticated = True
+        game_state.touch()
         return {"success": True, "message": "✅ Parent access granted!"}
     return {"success": False, "message": "❌ Wrong PIN. Try again!"}
 
 @app.post("/logout_parent")
-def api_logout_parent():
+async def api_logout_parent(game_state: GameState = Depends(get_game_state)):
     game_state.parent_authenticated = False
+    game_state.touch()
     return {"message": "👋 Parent logged out!"}
 
+@app.get("/videos")
+async def api_get_videos(request: Request, response: Response):
+    return _cached_json(request, response, VIDEO_CATALOGUE, max_age=3600, scope="public")
+
 @app.get("/get_video_for_subject")
-def api_get_video_for_subject(subject: str):
+async def api_get_video_for_subject(subject: str):
     if subject in SAMPLE_VIDEOS:
-        video = random.choice(SAMPLE_VIDEOS[subject])
-        return video
-    return {"title": "Sample Video 📺", "duration": "15:00", "url": "https://www.youtube.com/embed/dQw4w9WgXcQ"}
+        return _rng().choice(SAMPLE_VIDEOS[subject])._asdict()
+    return DEFAULT_VIDEO._asdict()
 
 @app.get("/simulate_attention_check")
-def api_simulate_attention_check():
-    attention_level = random.randint(60, 100)
+async def api_simulate_attention_check(game_state: GameState = Depends(get_game_state)):
+    attention_level = _rng().randint(60, 100)
     game_state.attention_score = attention_level
+    game_state.touch()
     
     if attention_level < 80:
-        questions = [
-            "Hey there! 👋 What was the last thing you learned?",
-            "Quick check! 🧠 Can you tell me one interesting fact from the video?",
-            "Stay focused! 💪 What do you think happens next?",
-            "Attention buddy! 👀 What's your favorite part so far?"
-        ]
         return {
             "needs_check": True,
-            "socratic_question": random.choice(questions), 
+            "socratic_question": _rng().choice(SOCRATIC_QUESTIONS), 
             "attention_level": attention_level
         }
     return {
@@ -166,46 +488,39 @@ def api_simulate_attention_check():
     }
 
 @app.post("/complete_video_watching")
-def api_complete_video_watching(req: VideoRequest):
+async def api_complete_video_watching(req: VideoRequest, game_state: GameState = Depends(get_game_state)):
     coins_earned = 20
     game_state.add_coins(coins_earned)
     game_state.videos_watched += 1
-    game_state.daily_progress["videos"] += 1
+    game_state.daily_videos += 1
+    game_state.touch()
     return {"message": f"🎉 Great job! You earned {coins_earned} coins for watching the video! 🎉", "coins_earned": coins_earned, "coins": game_state.coins}
 
 @app.post("/generate_quiz")
-def api_generate_quiz(req: QuizRequest):
+async def api_generate_quiz(req: QuizRequest, force_fresh: bool = False):
+    """Starts a quiz; prefetched quizzes are served instantly unless ?force_fresh=1."""
     if not req.subject or not req.grade:
         raise HTTPException(status_code=400, detail="Subject and grade are required")
-    questions = tutor_interface.generate_quiz(grade=req.grade, subject=req.subject, num_questions=5)
+    tutor = await asyncio.to_thread(get_tutor)
+    async with GENERATION_QUEUE.slot():
+        questions = await asyncio.to_thread(tutor.generate_quiz, grade=req.grade, subject=req.subject, num_questions=5, force_fresh=force_fresh)
     return {"questions": questions or []}
 
 @app.post("/calculate_quiz_score")
-def api_calculate_quiz_score(req: QuizScoreRequest):
-    correct = sum(1 for a, c in zip(req.answers, req.correct_answers) if a == c)
-    total = len(req.correct_answers)
+async def api_calculate_quiz_score(req: QuizScoreRequest, game_state: GameState = Depends(get_game_state)):
+    answers = np.asarray(req.answers)
+    correct_answers = np.asarray(req.correct_answers)
+    answered = min(len(answers), len(correct_answers))
+    correct = int(np.equal(answers[:answered], correct_answers[:answered]).sum())
+    total = len(correct_answers)
     percentage = (correct / total) * 100 if total > 0 else 0
     
-    if percentage >= 80:
-        coins = 50
-        emoji = "🎉"
-        message = "Amazing! You're a superstar!"
-    elif percentage >= 60:
-        coins = 30
-        emoji = "👏"
-        message = "Great job! Keep it up!"
-    elif percentage >= 40:
-        coins = 20
-        emoji = "👍"
-        message = "Good effort! Try again to improve!"
-    else:
-        coins = 10
-        emoji = "💪"
-        message = "Keep practicing! You'll get better!"
+    coins, emoji, message = QUIZ_SCORE_TIERS[bisect.bisect_right(QUIZ_SCORE_THRESHOLDS, percentage)]
     
     game_state.add_coins(coins)
     game_state.quizzes_completed += 1
-    game_state.daily_progress["quizzes"] += 1
+    game_state.daily_quizzes += 1
+    game_state.touch()
     
     return {
         "score": f"{correct}/{total}",
@@ -216,102 +531,230 @@ def api_calculate_quiz_score(req: QuizScoreRequest):
     }
 
 @app.get("/coin_display")
-def api_get_coin_display():
-    return {"display": f"🪙 {game_state.coins} Coins", "coins": game_state.coins}
+async def api_get_coin_display(request: Request, response: Response, game_state: GameState = Depends(get_game_state)):
+    payload = {"display": f"🪙 {game_state.coins} Coins", "coins": game_state.coins}
+    return _cached_json(request, response, payload, max_age=5)
 
 @app.post("/buy_perk")
-def api_buy_perk(req: PerkBuyRequest):
-    if 0 <= req.perk_index < len(PERKS_SHOP):
-        perk = PERKS_SHOP[req.perk_index]
-        if game_state.spend_coins(perk["cost"]):
-            game_state.unlocked_perks.append(perk["name"])
-            return {"message": f"🎉 You bought {perk['name']}! Enjoy your new perk!", "success": True}
+async def api_buy_perk(req: PerkBuyRequest, game_state: GameState = Depends(get_game_state)):
+    if 0 <= req.perk_index < len(_PERK_COSTS):
+        name, cost = _PERK_NAMES[req.perk_index], _PERK_COSTS[req.perk_index]
+        if game_state.spend_coins(cost):
+            game_state.unlocked_perks.append(name)
+            game_state.touch()
+            return {"message": f"🎉 You bought {name}! Enjoy your new perk!", "success": True}
         else:
-            return {"message": f"❌ Not enough coins! You need {perk['cost']} coins but only have {game_state.coins}.", "success": False}
+            return {"message": f"❌ Not enough coins! You need {cost} coins but only have {game_state.coins}.", "success": False}
     return {"message": "❌ Invalid perk selection.", "success": False}
 
 @app.get("/leaderboard")
-def api_get_leaderboard():
-    progress = f"""
-    🏆 **Your Progress** 🏆
-    
-    📊 **Stats:**
-    - 🪙 Total Coins Earned: {game_state.total_coins_earned}
-    - 🎯 Quizzes Completed: {game_state.quizzes_completed}
-    - 📺 Videos Watched: {game_state.videos_watched}
-    - 🔥 Current Level: {game_state.current_level}
-    
-    🎁 **Unlocked Perks:** {', '.join(game_state.unlocked_perks) if game_state.unlocked_perks else 'None yet - visit the shop!'}
-    
-    📈 **Today's Progress:**
-    - Videos: {game_state.daily_progress["videos"]} 📺
-    - Quizzes: {game_state.daily_progress["quizzes"]} 🎯
-    """
-    return {"leaderboard": progress}
+async def api_get_leaderboard(request: Request, response: Response, game_state: GameState = Depends(get_game_state)):
+    return _cached_json(request, response, {
+        "total_coins_earned": game_state.total_coins_earned,
+        "quizzes_completed": game_state.quizzes_completed,
+        "videos_watched": game_state.videos_watched,
+        "current_level": game_state.current_level,
+        "unlocked_perks": game_state.unlocked_perks,
+        "daily": {"videos": game_state.daily_videos, "quizzes": game_state.daily_quizzes},
+    }, max_age=5)
+
+PARENT_DASHBOARD_SETTINGS = {"webcam_monitoring": True, "study_reminders": True, "screen_time_limit_hours": 2}
+PARENT_DASHBOARD_RECOMMENDATIONS = (
+    "Encourage more Science videos",
+    "Practice Math quizzes for better scores",
+    "Celebrate achievements with family time!",
+)
 
 @app.get("/parent_dashboard")
-def api_get_parent_dashboard():
+async def api_get_parent_dashboard(request: Request, response: Response, game_state: GameState = Depends(get_game_state)):
     if not game_state.parent_authenticated:
         raise HTTPException(status_code=403, detail="🔒 Please log in as parent first!")
     
-    dashboard = f"""
-    👨‍👩‍👧‍👦 **Parent Dashboard** 👨‍👩‍👧‍👦
-    
-    📊 **Child's Progress:**
-    - 🎯 Quizzes Completed: {game_state.quizzes_completed}
-    - 📺 Videos Watched: {game_state.videos_watched}
-    - 🪙 Coins Earned: {game_state.total_coins_earned}
-    - 👀 Average Attention Score: {game_state.attention_score}%
-    
-    ⚙️ **Settings:**
-    - Webcam Monitoring: {"✅ Enabled" if True else "❌ Disabled"}
-    - Study Reminders: {"✅ Enabled" if True else "❌ Disabled"}
-    - Screen Time Limit: 2 hours/day
-    
-    📈 **Weekly Summary:**
-    Your child is doing great! They've maintained good focus and are learning consistently.
-    
-    💡 **Recommendations:**
-    - Encourage more Science videos
-    - Practice Math quizzes for better scores
-    - Celebrate achievements with family time!
-    """
-    return {"dashboard": dashboard}
+    # max-age=0: always revalidate, since the parent login can change between polls
+    return _cached_json(request, response, {
+        "quizzes_completed": game_state.quizzes_completed,
+        "videos_watched": game_state.videos_watched,
+        "total_coins_earned": game_state.total_coins_earned,
+        "attention_score": game_state.attention_score,
+        "settings": PARENT_DASHBOARD_SETTINGS,
+        "recommendations": PARENT_DASHBOARD_RECOMMENDATIONS,
+    }, max_age=0)
+
+@app.get("/cache_stats")
+async def api_get_cache_stats(game_state: GameState = Depends(get_game_state)):
+    if not game_state.parent_authenticated:
+        raise HTTPException(status_code=403, detail="🔒 Please log in as parent first!")
+    if _tutor is None:
+        return {"responses": None, "roadmaps": 0}
+    return _tutor.cache_stats()
 
 @app.post("/generate_roadmap")
-def api_generate_roadmap(req: RoadmapRequest):
-    if not tutor_ready:
+async def api_generate_roadmap(req: RoadmapRequest):
+    if not await asyncio.to_thread(is_tutor_ready):
         raise HTTPException(status_code=503, detail="The AI Tutor is not ready. Please check the setup.")
     if not all([req.grade, req.board, req.subject]):
         raise HTTPException(status_code=400, detail="Please select a grade, board, and subject to create a roadmap.")
     
-    roadmap = tutor_interface.generate_learning_roadmap(req.grade, req.board, req.subject)
-    return {"roadmap": roadmap}
+    cached = get_tutor().has_cached_roadmap(req.grade, req.board, req.subject)
+    async with GENERATION_QUEUE.slot():
+        roadmap = await get_tutor().agenerate_learning_roadmap(req.grade, req.board, req.subject)
+    return {"roadmap": roadmap, "cached": cached}
+
+def _fallback_chat_response(req: ChatRequest) -> str:
+    """Canned reply used when the AI API fails."""
+    template = FALLBACK_CHAT_TEMPLATES.get(req.message.lower().strip(), FALLBACK_CHAT_GENERIC)
+    return template.format(subject=req.subject, message=req.message)
+
+async def _answer_chat_batch(requests: list[tuple[str, str, str]]) -> list[str]:
+    """Answers (message, subject, grade) chats together; every caller already holds its own chat-queue slot."""
+    return await asyncio.to_thread(get_tutor().chat_with_tutor_batch, requests, max_workers=len(requests))
+
+class ChatBatcher:
+    """Collects chat messages that arrive within a short window and answers them as one batch.
+    
+    Concurrent students then share one thread-pool fan-out, and identical
+    questions are answered once. Callers submit while holding a CHAT_QUEUE
+    slot, so a batch never runs more LLM calls than the slots it represents.
+    """
+    
+    def __init__(self, window: float = 0.02, max_batch_size: int = CHAT_QUEUE.concurrency_limit):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: list[tuple[tuple[str, str, str], asyncio.Future]] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._dispatching: set[asyncio.Task] = set()
+    
+    async def submit(self, message: str, subject: str, grade: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((message, subject, grade), future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.window, self._flush)
+        return await future
+    
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+    
+    async def _dispatch(self, batch: list[tuple[tuple[str, str, str], asyncio.Future]]):
+        try:
+            replies = await _answer_chat_batch([request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), reply in zip(batch, replies):
+            if not future.done():
+                future.set_result(reply)
+
+CHAT_BATCHER = ChatBatcher()
+
+async def _queued_chat(message: str, subject: str, grade: str) -> str:
+    """Answers one chat message through the batcher, holding one chat-queue slot while it waits."""
+    async with CHAT_QUEUE.slot():
+        return await CHAT_BATCHER.submit(message, subject, grade)
 
 @app.post("/chat_with_tutor")
-def api_chat_with_tutor(req: ChatRequest):
-    if not tutor_ready:
+async def api_chat_with_tutor(req: ChatRequest):
+    if not await asyncio.to_thread(is_tutor_ready):
         return {"response": "The AI Tutor is currently offline. Please try again later."}
     
     try:
-        bot_response = tutor_interface.chat_with_tutor(req.message, req.subject, req.grade)
+        bot_response = await _queued_chat(req.message, req.subject, req.grade)
         return {"response": bot_response}
+    except HTTPException:
+        raise
     except Exception as e:
         # Fallback response if AI API fails
-        fallback_responses = {
-            "hello": f"Hello! I'm your AI tutor for {req.subject}. How can I help you learn today? 🤖",
-            "hi": f"Hi there! Ready to explore {req.subject}? What would you like to learn? 📚",
-            "help": f"I'm here to help you with {req.subject}! You can ask me questions about concepts, problems, or explanations. What specific topic interests you?",
-        }
-        
-        response = fallback_responses.get(req.message.lower().strip(), 
-            f"I understand you're asking about '{req.message}' in {req.subject}. While I'm having some connection issues with the advanced AI right now, I can still help! Could you be more specific about what you'd like to learn? 🎓")
+        print(f"Chat error: {e}")
+        return {"response": _fallback_chat_response(req)}
+
+@app.post("/prefetch_chat", status_code=204)
+async def api_prefetch_chat(req: ChatRequest):
+    """Warms the embedding and syllabus search for a message the student is still typing."""
+    if _tutor is not None and len(req.message) >= CHAT_PREFETCH_MIN_CHARS and await asyncio.to_thread(is_tutor_ready):
+        await asyncio.to_thread(_tutor.prefetch_chat_context, req.message, req.subject)
+    return Response(status_code=204)
+
+@app.post("/chat_with_tutor_batch")
+async def api_chat_with_tutor_batch(req: ChatBatchRequest):
+    """Answers up to MAX_CHAT_BATCH_SIZE chat messages in one round trip."""
+    if len(req.requests) > MAX_CHAT_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {MAX_CHAT_BATCH_SIZE} messages.")
+    if not await asyncio.to_thread(is_tutor_ready):
+        return {"responses": ["The AI Tutor is currently offline. Please try again later."] * len(req.requests)}
+    
+    try:
+        responses = await asyncio.gather(*(_queued_chat(r.message, r.subject, r.grade) for r in req.requests))
+        return {"responses": responses}
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Fallback response if AI API fails
+        print(f"Chat batch error: {e}")
+        return {"responses": [_fallback_chat_response(r) for r in req.requests]}
+
+async def _throttled(chunks: AsyncIterator[str], min_interval: float = 0.05) -> AsyncIterator[str]:
+    """Coalesces a token stream so at most one chunk is sent per min_interval seconds.
+    
+    The first chunk goes out immediately; later tokens are buffered and flushed
+    together, bounding the number of writes (and client re-renders) per reply.
+    """
+    buffer = []
+    last_sent = 0.0
+    async for chunk in chunks:
+        buffer.append(chunk)
+        now = time.monotonic()
+        if now - last_sent >= min_interval:
+            yield "".join(buffer)
+            buffer.clear()
+            last_sent = now
+    if buffer:
+        yield "".join(buffer)
+
+@app.post("/chat_with_tutor_stream")
+async def api_chat_with_tutor_stream(req: ChatRequest):
+    """Streams the tutor's reply as plain-text chunks so the UI can render it while it is generated."""
+    async def stream():
+        if not await asyncio.to_thread(is_tutor_ready):
+            yield "The AI Tutor is currently offline. Please try again later."
+            return
         
-        return {"response": response}
+        try:
+            async with CHAT_QUEUE.slot():
+                async for chunk in _throttled(get_tutor().achat_with_tutor_stream(req.message, req.subject, req.grade)):
+                    yield chunk
+        except HTTPException as e:
+            yield e.detail
+        except Exception as e:
+            # Fallback response if AI API fails
+            print(f"Chat stream error: {e}")
+            yield _fallback_chat_response(req)
+    
+    return StreamingResponse(stream(), media_type="text/plain; charset=utf-8")
 
 # Add more endpoints if needed (e.g., for daily progress reset, etc.)
 
 if __name__ == "__main__":
     import uvicorn
     print("🚀 Starting AI Tutor API...")
-    uvicorn.run("api:app", host="localhost", port=8000, reload=False)
\ No newline at end of file
+    uvicorn.run(
+        "api:app",
+        host=os.environ.get("HOST", "localhost"),
+        port=int(os.environ.get("PORT", "8000")),
+        reload=DEBUG,
+        access_log=DEBUG,
+        log_level="debug" if DEBUG else "info",
+        # Shed load with a 503 past this many open connections instead of queueing without bound
+        limit_concurrency=int(os.environ.get("MAX_CONNECTIONS", "256")),
+        server_header=False,
+    )
\ No newline at end of file
@@ -1,17 +1,31 @@
 import os
 import glob
-from langchain_community.document_loaders import PyPDFLoader
+import math
+import uuid
+import faiss
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from tqdm import tqdm
+from langchain_community.document_loaders import PyPDFium2Loader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
 from src.utils.euriai_embeddings import EuriaiEmbeddings
 from dotenv import load_dotenv
 
 load_dotenv()
 
+EMBED_BATCH_SIZE = 64
+EMBED_WORKERS = 8
+# Below this many chunks an exact (float16) index is already fast; above it, use IVF-PQ
+IVFPQ_MIN_VECTORS = 10_000
+IVFPQ_MAX_SUBQUANTIZERS = 64
+
 def parse_pdf(file_path: str, board: str, grade: str, subject: str):
     """Parse PDF and add metadata to each chunk."""
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    loader = PyPDFLoader(file_path)
+    loader = PyPDFium2Loader(file_path)
     documents = loader.load_and_split(text_splitter)
     
     for doc in documents:
@@ -19,6 +33,56 @@ def parse_pdf(file_path: str, board: str, grade: str, subject: str):
     
     return documents
 
+def parse_pdf_file(pdf_path: str):
+    """Parse one syllabus PDF named Board_Grade_Subject.pdf; returns no documents on bad names or errors."""
+    file_name = os.path.basename(pdf_path)
+    parts = file_name.replace('.pdf', '').split('_')
+    
+    if len(parts) < 3:
+        print(f"⚠️  Skipping {file_name} (wrong format)")
+        return []
+        
+    board, grade, subject = parts[0], parts[1], "_".join(parts[2:])
+    print(f"   Processing {file_name}...")
+    
+    try:
+        return parse_pdf(pdf_path, board, grade, subject)
+    except Exception as e:
+        print(f"❌ Error with {file_name}: {e}")
+        return []
+
+def build_index(vecs: np.ndarray) -> faiss.Index:
+    """Picks the FAISS index for the corpus size: float16 flat storage, or IVF-PQ for large corpora."""
+    n, d = vecs.shape
+    if n < IVFPQ_MIN_VECTORS:
+        # Exact search over vectors stored as float16: half the memory and bandwidth of float32
+        index = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+    else:
+        # FAISS wants ~39 training points per inverted list, so small corpora get fewer lists
+        nlist = max(1, min(4096, 4 * int(math.sqrt(n)), n // 39))
+        # PQ splits each vector into m equal sub-vectors, so m has to divide the dimension
+        m = max(i for i in range(1, IVFPQ_MAX_SUBQUANTIZERS + 1) if d % i == 0)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(d), d, nlist, m, 8)
+    index.train(vecs)
+    index.add(vecs)
+    return index
+
+def build_faiss_store(texts, vectors, metadatas, embedding_function):
+    """Builds the LangChain FAISS store over the index chosen by build_index."""
+    index = build_index(np.asarray(vectors, dtype=np.float32))
+
+    ids = [str(uuid.uuid4()) for _ in texts]
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata=metadata)
+        for doc_id, text, metadata in zip(ids, texts, metadatas)
+    })
+    return FAISS(
+        embedding_function=embedding_function,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
 def main():
     """Setup PDFs and create FAISS index for the AI Tutor."""
     print("Setting up AI Tutor data...")
@@ -39,23 +103,11 @@ def main():
 
     print(f"📚 Processing {len(pdf_files)} PDF files...")
 
+    # PDF decoding and splitting are CPU-bound, so each file is parsed in its own process
     all_documents = []
-    for pdf_path in pdf_files:
-        file_name = os.path.basename(pdf_path)
-        parts = file_name.replace('.pdf', '').split('_')
-        
-        if len(parts) < 3:
-            print(f"⚠️  Skipping {file_name} (wrong format)")
-            continue
-            
-        board, grade, subject = parts[0], parts[1], "_".join(parts[2:])
-        print(f"   Processing {file_name}...")
-        
-        try:
-            documents = parse_pdf(pdf_path, board, grade, subject)
+    with ProcessPoolExecutor(max_workers=min(len(pdf_files), os.cpu_count() or 1)) as executor:
+        for documents in executor.map(parse_pdf_file, pdf_files):
             all_documents.extend(documents)
-        except Exception as e:
-            print(f"❌ Error with {file_name}: {e}")
 
     if not all_documents:
         print("❌ No documents parsed successfully")
@@ -63,7 +115,17 @@ def main():
 
     try:
         print("🧠 Creating AI index...")
-        faiss_index = FAISS.from_documents(all_documents, embedding_function)
+        texts = [doc.page_content for doc in all_documents]
+        metadatas = [doc.metadata for doc in all_documents]
+        
+        # Embed in batches of EMBED_BATCH_SIZE, several requests in flight at once
+        batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        vectors = []
+        with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as executor:
+            for batch_vectors in tqdm(executor.map(embedding_function.embed_documents, batches), total=len(batches), desc="Embedding", unit="batch"):
+                vectors.extend(batch_vectors)
+        
+        faiss_index = build_faiss_store(texts, vectors, metadatas, embedding_function)
 
         index_path = "data/vector_store/faiss_index"
         os.makedirs(os.path.dirname(index_path), exist_ok=True)
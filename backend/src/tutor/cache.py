@@ -0,0 +1,251 @@
+"""
+Response caches for the AI Tutor
+Lets repeated or near-duplicate student questions skip the LLM entirely.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def _write_atomic(path: str, data: bytes):
+    """Writes through a temporary file and os.replace, so a crash mid-write leaves the previous file intact."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class LRUCache:
+    """A small thread-safe least-recently-used cache, optionally expiring entries after ttl_seconds."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expiry on the monotonic clock or None, value)
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def _live(self, key: Hashable) -> bool:
+        """Whether key is present and unexpired; drops it if it has expired. Call with the lock held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self._stats["evictions"] += 1
+            return False
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._live(key)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if not self._live(key):
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][1]
+
+    def put(self, key: Hashable, value: Any):
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of the unexpired entries, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (expires, value) in self._entries.items() if expires is None or expires > now]
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters and the number of entries."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving while it runs wait for and share its result."""
+
+    def __init__(self):
+        # key -> (set when the call finishes, [result, exception])
+        self._calls: Dict[Hashable, Tuple[threading.Event, List[Any]]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = (threading.Event(), [None, None])
+        done, outcome = call
+
+        if leader:
+            try:
+                outcome[0] = fn()
+            except BaseException as e:
+                outcome[1] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                done.set()
+        else:
+            done.wait()
+
+        if outcome[1] is not None:
+            raise outcome[1]
+        return outcome[0]
+
+class SemanticCache:
+    """Two-tier cache: exact repeats are answered without embedding, near-duplicates by cosine similarity."""
+
+    def __init__(self, embed: Callable[[str], List[float]], threshold: float = 0.92, max_entries: int = 1024):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # (namespace, normalized text) -> response, for repeats that need no embedding call
+        self._exact: "OrderedDict[Tuple, str]" = OrderedDict()
+        # namespace -> (unit-norm embedding matrix [N, d], texts [N], responses [N])
+        self._entries: Dict[Tuple, Tuple[np.ndarray, List[str], List[str]]] = {}
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _vector(self, text: str) -> Optional[np.ndarray]:
+        """Embeds and L2-normalizes text so a dot product is the cosine similarity."""
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _remember_exact(self, namespace: Tuple, text: str, response: str):
+        key = (namespace, self._normalize(text))
+        self._exact[key] = response
+        self._exact.move_to_end(key)
+        while len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
+
+    def lookup(self, namespace: Tuple, text: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """Returns (cached response or None, query embedding for a later store)."""
+        key = (namespace, self._normalize(text))
+        with self._lock:
+            if key in self._exact:
+                self._exact.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return self._exact[key], None
+
+        vector = self._vector(text)
+        with self._lock:
+            if vector is None:
+                self._stats["misses"] += 1
+                return None, None
+
+            matrix, _, responses = self._entries.get(namespace, (None, None, None))
+            if matrix is not None and matrix.shape[1] == vector.shape[0]:
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._stats["semantic_hits"] += 1
+                    return responses[best], vector
+
+            self._stats["misses"] += 1
+        return None, vector
+
+    def store(self, namespace: Tuple, text: str, vector: Optional[np.ndarray], response: str):
+        """Adds a response under the embedding returned by lookup, evicting the oldest entries when full."""
+        with self._lock:
+            self._remember_exact(namespace, text, response)
+            if vector is None:
+                return
+
+            matrix, texts, responses = self._entries.get(namespace, (None, [], []))
+            if matrix is None or matrix.shape[1] != vector.shape[0]:
+                matrix, texts, responses = vector[np.newaxis, :], [text], [response]
+            else:
+                keep = max(0, len(responses) - self.max_entries + 1)
+                matrix = np.vstack([matrix[keep:], vector])
+                texts = texts[keep:] + [text]
+                responses = responses[keep:] + [response]
+            self._entries[namespace] = (matrix, texts, responses)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the number of stored answers."""
+        with self._lock:
+            return {
+                **self._stats,
+                "exact_entries": len(self._exact),
+                "semantic_entries": sum(len(responses) for _, _, responses in self._entries.values()),
+            }
+
+    @staticmethod
+    def _stem(directory: str, namespace: Tuple) -> str:
+        # Named by the namespace itself, so each save overwrites the same pair of files
+        digest = hashlib.blake2b(json.dumps(list(namespace)).encode(), digest_size=8).hexdigest()
+        return os.path.join(directory, f"namespace_{digest}")
+
+    def save(self, directory: str):
+        """Writes each namespace's embeddings (.npy) and texts/responses (.json) so a restart starts warm."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            entries = list(self._entries.items())
+        written = set()
+        for namespace, (matrix, texts, responses) in entries:
+            stem = self._stem(directory, namespace)
+            buffer = io.BytesIO()
+            np.save(buffer, matrix)
+            _write_atomic(f"{stem}.npy", buffer.getvalue())
+            _write_atomic(f"{stem}.json", json.dumps(
+                {"namespace": list(namespace), "texts": texts, "responses": responses}, ensure_ascii=False).encode("utf-8"))
+            written.update((f"{stem}.npy", f"{stem}.json"))
+        # Files of namespaces no longer held (or from older layouts) would otherwise be reloaded
+        for path in glob.glob(os.path.join(directory, "namespace_*")):
+            if path not in written:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.error(f"Error removing stale cached responses {path}: {e}")
+
+    def load(self, directory: str):
+        """Restores namespaces written by save(); unreadable or mismatched files are skipped."""
+        for json_path in glob.glob(os.path.join(directory, "namespace_*.json")):
+            try:
+                with open(json_path, encoding="utf-8") as f:
+                    data = json.load(f)
+                matrix = np.load(json_path[:-len(".json")] + ".npy")
+                namespace, texts, responses = tuple(data["namespace"]), data["texts"], data["responses"]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Error loading cached responses from {json_path}: {e}")
+                continue
+            # A crash between the two writes can pair embeddings with another save's texts
+            if matrix.ndim != 2 or not len(matrix) == len(texts) == len(responses):
+                logger.error(f"Skipping cached responses in {json_path}: embeddings and texts don't match")
+                continue
+
+            with self._lock:
+                self._entries[namespace] = (matrix, texts, responses)
+                for text, response in zip(texts, responses):
+                    self._remember_exact(namespace, text, response)
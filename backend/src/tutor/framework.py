@@ -4,13 +4,74 @@ Uses only available models from EuriAI dashboard
 """
 
 from euriai import EuriaiClient
+import aiohttp
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+import asyncio
+import functools
+import hashlib
 import os
+import json
 import time
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Generator, Optional, List
 from dotenv import load_dotenv
 
+from src.tutor.cache import LRUCache, SingleFlight
+
 load_dotenv()
 
+# Best model per task type and complexity
+SELECTION_MATRIX = {
+    "chat": {"simple": "gemini-2.5-flash", "medium": "gpt-4.1-nano", "complex": "gpt-4.1-mini"},
+    "math": {"simple": "gpt-4.1-mini", "medium": "deepseek-r1-distill-llama-70b", "complex": "gemini-2.5-pro"},
+    "science": {"simple": "gemini-2.5-flash", "medium": "gpt-4.1-mini", "complex": "gemini-2.5-pro"},
+    "creative": {"simple": "gpt-4.1-nano", "medium": "gpt-4.1-mini", "complex": "gemini-2.5-pro"},
+    "reasoning": {"simple": "gpt-4.1-mini", "medium": "llama-4-scout-17b-16e-instruct", "complex": "gemini-2.5-pro"},
+}
+
+# Kid-friendly explanation style per grade
+GRADE_ADAPTATIONS = {
+    "5th": "Explain in very simple terms for a 10-year-old. Use easy words and fun examples.",
+    "6th": "Explain clearly for an 11-year-old student. Use examples they can relate to.",
+    "7th": "Explain for a 12-year-old. Be thorough but clear.",
+    "8th": "Explain for a 13-year-old preparing for high school."
+}
+
+CHAT_PROMPT = """
+        {adaptation}
+        Use emojis to make it fun. Be encouraging and positive.
+        
+        Student's question: "{prompt}"
+        """
+
+# Chat prompts with the grade's adaptation already filled in; only the question varies per request
+CHAT_PROMPTS = {
+    grade: CHAT_PROMPT.format(adaptation=adaptation, prompt="{prompt}")
+    for grade, adaptation in GRADE_ADAPTATIONS.items()
+}
+DEFAULT_CHAT_PROMPT = CHAT_PROMPT.format(adaptation="Explain clearly for a middle school student.", prompt="{prompt}")
+
+# Identical completion requests within the TTL are answered from memory
+RESPONSE_CACHE_SIZE = 2000
+RESPONSE_CACHE_TTL_SECONDS = 600
+
+@functools.lru_cache(maxsize=256)
+def _body_prefix(model: str, temperature: float, max_tokens: int, stream: bool) -> bytes:
+    """The fixed part of a completion request body, serialized once per (model, settings)."""
+    fields = {"model": model, "temperature": temperature, "max_tokens": max_tokens}
+    if stream:
+        fields["stream"] = True
+    return orjson.dumps(fields)[:-1] + b',"messages":'
+
+def _request_body(model: str, prompt: str, temperature: float, max_tokens: int, stream: bool = False) -> bytes:
+    """A chat-completions JSON body; only the messages are encoded per call."""
+    return _body_prefix(model, temperature, max_tokens, stream) + orjson.dumps([{"role": "user", "content": prompt}]) + b"}"
+
+def is_answer(text: str) -> bool:
+    """Whether completion text is a real answer, not empty or one of the parse-failure ("Error...") messages."""
+    return bool(text) and not text.startswith("Error")
+
 class EuriaiModelFramework:
     """Intelligent model selection and routing for educational AI"""
     
@@ -20,6 +81,18 @@ class EuriaiModelFramework:
             model="gpt-4.1-nano"  # Default
         )
         self.usage_stats = {}
+        self.response_cache = LRUCache(max_entries=RESPONSE_CACHE_SIZE, ttl_seconds=RESPONSE_CACHE_TTL_SECONDS)
+        # Identical requests already in flight are joined rather than sent again
+        self._inflight = SingleFlight()
+        self._ainflight: Dict[str, asyncio.Task] = {}
+        # Shared by all async calls so HTTPS connections are reused; created on first use
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        # The loop the session was created on; a session can't be used from another
+        self._http_session_loop: Optional[asyncio.AbstractEventLoop] = None
+        # The blocking calls' equivalent, pooled across the worker threads
+        self._sync_session = requests.Session()
+        self._sync_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+        self._headers = {"Authorization": f"Bearer {self.client.api_key}", "Content-Type": "application/json"}
         
     def select_optimal_model(self, 
                            task_type: str,
@@ -27,15 +100,7 @@ class EuriaiModelFramework:
                            speed_priority: str = "balanced",
                            subject: str = "general") -> str:
         """Selects the best model based on the task, complexity, and subject."""
-        selection_matrix = {
-            "chat": {"simple": "gemini-2.5-flash", "medium": "gpt-4.1-nano", "complex": "gpt-4.1-mini"},
-            "math": {"simple": "gpt-4.1-mini", "medium": "deepseek-r1-distill-llama-70b", "complex": "gemini-2.5-pro"},
-            "science": {"simple": "gemini-2.5-flash", "medium": "gpt-4.1-mini", "complex": "gemini-2.5-pro"},
-            "creative": {"simple": "gpt-4.1-nano", "medium": "gpt-4.1-mini", "complex": "gemini-2.5-pro"},
-            "reasoning": {"simple": "gpt-4.1-mini", "medium": "llama-4-scout-17b-16e-instruct", "complex": "gemini-2.5-pro"},
-        }
-        
-        model = selection_matrix.get(task_type, {}).get(complexity, "gpt-4.1-nano")
+        model = SELECTION_MATRIX.get(task_type, {}).get(complexity, "gpt-4.1-nano")
         
         # Subject-specific overrides for high-complexity tasks
         if complexity == "complex":
@@ -48,20 +113,22 @@ class EuriaiModelFramework:
     
     def _adapt_prompt_for_chat(self, prompt: str, grade: str) -> str:
         """Applies a kid-friendly persona ONLY for conversational chat."""
-        grade_adaptations = {
-            "5th": "Explain in very simple terms for a 10-year-old. Use easy words and fun examples.",
-            "6th": "Explain clearly for an 11-year-old student. Use examples they can relate to.",
-            "7th": "Explain for a 12-year-old. Be thorough but clear.",
-            "8th": "Explain for a 13-year-old preparing for high school."
-        }
-        adaptation = grade_adaptations.get(grade, "Explain clearly for a middle school student.")
-        
-        return f"""
-        {adaptation}
-        Use emojis to make it fun. Be encouraging and positive.
-        
-        Student's question: "{prompt}"
-        """
+        return CHAT_PROMPTS.get(grade, DEFAULT_CHAT_PROMPT).format(prompt=prompt)
+
+    @staticmethod
+    def _cache_key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+        return hashlib.blake2b(f"{model}\0{temperature}\0{max_tokens}\0{prompt}".encode(), digest_size=16).hexdigest()
+
+    def _cached_result(self, key: str, model: str) -> Optional[Dict]:
+        response = self.response_cache.get(key)
+        if response is None:
+            return None
+        return {"response": response, "model_used": model, "response_time": 0, "success": True}
+
+    def _remember(self, key: str, content: str):
+        # Parse failures come back as "Error..." text; those shouldn't be replayed for the TTL
+        if is_answer(content):
+            self.response_cache.put(key, content)
 
     def generate_response(self,
                          prompt: str,
@@ -71,40 +138,248 @@ class EuriaiModelFramework:
                          subject: str = "general",
                          grade: str = "6th",
                          temperature: float = 0.7,
-                         max_tokens: int = 4096) -> Dict:
-        """Generates a response with intelligent model selection and appropriate prompting."""
+                         max_tokens: int = 4096,
+                         use_cache: bool = True) -> Dict:
+        """Generates a response with intelligent model selection and appropriate prompting.
+        
+        Pass use_cache=False when repeated calls should produce different answers.
+        """
         
         selected_model = self.select_optimal_model(task_type, complexity, speed_priority, subject)
         
         # Adapt prompt only for chat tasks
         final_prompt = self._adapt_prompt_for_chat(prompt, grade) if task_type == "chat" else prompt
         
+        key = self._cache_key(selected_model, temperature, max_tokens, final_prompt)
+        cached = self._cached_result(key, selected_model) if use_cache else None
+        if cached is not None:
+            return cached
+        
+        if not use_cache:
+            return self._complete(key, selected_model, final_prompt, temperature, max_tokens)
+        return self._inflight.do(key, lambda: self._complete(key, selected_model, final_prompt, temperature, max_tokens))
+
+    def _complete(self, key: str, selected_model: str, final_prompt: str, temperature: float, max_tokens: int) -> Dict:
         start_time = time.time()
         
         try:
-            self.client.model = selected_model
-            response = self.client.generate_completion(
-                prompt=final_prompt,
-                temperature=temperature,
-                max_tokens=max_tokens
+            # Same request the SDK's generate_completion sends, over the pooled session
+            # instead of a new connection (and TLS handshake) per call
+            http_response = self._sync_session.post(
+                self.client.endpoint,
+                headers=self._headers,
+                data=_request_body(selected_model, final_prompt, temperature, max_tokens),
+                timeout=60,
             )
+            http_response.raise_for_status()
+            response = http_response.json()
             
             end_time = time.time()
             response_time = end_time - start_time
             
             parsed_content = self._parse_completion_response(response)
             self._track_usage(selected_model, response_time, len(parsed_content))
+            self._remember(key, parsed_content)
             
             return {
                 "response": parsed_content,
                 "model_used": selected_model,
                 "response_time": response_time,
-                "success": True
+                # Empty or cut-off completions are reported as failures so callers don't cache them
+                "success": is_answer(parsed_content)
             }
             
         except Exception as e:
             return self._fallback_response(str(e))
     
+    async def _session(self) -> aiohttp.ClientSession:
+        """The shared aiohttp session, recreated if it was closed or belongs to another event loop."""
+        loop = asyncio.get_running_loop()
+        session = self._http_session
+        if session is None or session.closed or self._http_session_loop is not loop:
+            self._http_session_loop = loop
+            session = self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=60),
+            )
+        return session
+
+    def close(self):
+        """Closes the pooled connections of the blocking calls."""
+        self._sync_session.close()
+
+    async def aclose(self):
+        """Closes the shared async HTTP session."""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        self._http_session_loop = None
+
+    async def agenerate_response(self,
+                                 prompt: str,
+                                 task_type: str = "chat",
+                                 complexity: str = "medium",
+                                 speed_priority: str = "balanced",
+                                 subject: str = "general",
+                                 grade: str = "6th",
+                                 temperature: float = 0.7,
+                                 max_tokens: int = 4096,
+                                 use_cache: bool = True) -> Dict:
+        """Async version of generate_response: waits on the API without holding a thread."""
+        
+        selected_model = self.select_optimal_model(task_type, complexity, speed_priority, subject)
+        final_prompt = self._adapt_prompt_for_chat(prompt, grade) if task_type == "chat" else prompt
+        
+        key = self._cache_key(selected_model, temperature, max_tokens, final_prompt)
+        cached = self._cached_result(key, selected_model) if use_cache else None
+        if cached is not None:
+            return cached
+        
+        if not use_cache:
+            return await self._acomplete(key, selected_model, final_prompt, temperature, max_tokens)
+        # The shared call runs as its own task so one caller disconnecting doesn't cancel it for the others
+        task = self._ainflight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._acomplete(key, selected_model, final_prompt, temperature, max_tokens))
+            self._ainflight[key] = task
+            task.add_done_callback(lambda done: self._ainflight.pop(key, None) if self._ainflight.get(key) is done else None)
+        return await asyncio.shield(task)
+
+    async def _acomplete(self, key: str, selected_model: str, final_prompt: str, temperature: float, max_tokens: int) -> Dict:
+        start_time = time.time()
+        
+        try:
+            session = await self._session()
+            async with session.post(
+                self.client.endpoint,
+                headers=self._headers,
+                data=_request_body(selected_model, final_prompt, temperature, max_tokens),
+            ) as http_response:
+                http_response.raise_for_status()
+                response = await http_response.json()
+            
+            response_time = time.time() - start_time
+            parsed_content = self._parse_completion_response(response)
+            self._track_usage(selected_model, response_time, len(parsed_content))
+            self._remember(key, parsed_content)
+            
+            return {
+                "response": parsed_content,
+                "model_used": selected_model,
+                "response_time": response_time,
+                # Empty or cut-off completions are reported as failures so callers don't cache them
+                "success": is_answer(parsed_content)
+            }
+            
+        except Exception as e:
+            return self._fallback_response(str(e))
+    
+    def generate_response_stream(self,
+                                prompt: str,
+                                task_type: str = "chat",
+                                complexity: str = "medium",
+                                speed_priority: str = "balanced",
+                                subject: str = "general",
+                                grade: str = "6th",
+                                temperature: float = 0.7,
+                                max_tokens: int = 4096) -> Generator[str, None, bool]:
+        """Streams a response chunk-by-chunk as the model generates it.
+        
+        The generator's return value reports whether the model answered (False means
+        the fallback message was streamed instead).
+        """
+        
+        selected_model = self.select_optimal_model(task_type, complexity, speed_priority, subject)
+        final_prompt = self._adapt_prompt_for_chat(prompt, grade) if task_type == "chat" else prompt
+        
+        # A dedicated client per stream: the generator runs lazily, so sharing
+        # self.client would let concurrent requests swap the model mid-flight.
+        client = EuriaiClient(api_key=self.client.api_key, model=selected_model)
+        start_time = time.time()
+        streamed_length = 0
+        
+        try:
+            for line in client.stream_completion(
+                prompt=final_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens
+            ):
+                delta = self._parse_stream_chunk(line)
+                if delta:
+                    streamed_length += len(delta)
+                    yield delta
+            
+            self._track_usage(selected_model, time.time() - start_time, streamed_length)
+            # A stream that ended without any text is no answer
+            return streamed_length > 0
+            
+        except Exception as e:
+            yield self._fallback_response(str(e))["response"]
+            return False
+    
+    async def astream_response(self,
+                               prompt: str,
+                               task_type: str = "chat",
+                               complexity: str = "medium",
+                               speed_priority: str = "balanced",
+                               subject: str = "general",
+                               grade: str = "6th",
+                               temperature: float = 0.7,
+                               max_tokens: int = 4096,
+                               outcome: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Async version of generate_response_stream, parsing the server-sent events on the shared session.
+        
+        An async generator can't return a value, so whether the model answered is
+        written to outcome["success"] when the stream ends.
+        """
+        
+        selected_model = self.select_optimal_model(task_type, complexity, speed_priority, subject)
+        final_prompt = self._adapt_prompt_for_chat(prompt, grade) if task_type == "chat" else prompt
+        
+        start_time = time.time()
+        streamed_length = 0
+        
+        try:
+            session = await self._session()
+            async with session.post(
+                self.client.endpoint,
+                headers=self._headers,
+                data=_request_body(selected_model, final_prompt, temperature, max_tokens, stream=True),
+                # Long answers may stream for over a minute; only a stalled stream times out
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=60),
+            ) as http_response:
+                http_response.raise_for_status()
+                async for line in http_response.content:
+                    delta = self._parse_stream_chunk(line.decode("utf-8").strip())
+                    if delta:
+                        streamed_length += len(delta)
+                        yield delta
+            
+            self._track_usage(selected_model, time.time() - start_time, streamed_length)
+            success = streamed_length > 0
+            
+        except Exception as e:
+            yield self._fallback_response(str(e))["response"]
+            success = False
+        
+        if outcome is not None:
+            outcome["success"] = success
+    
+    def _parse_stream_chunk(self, line: str) -> str:
+        """Extracts the text delta from a single server-sent event line."""
+        if not line.startswith("data:"):
+            return ""
+        
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return ""
+        
+        try:
+            choice = json.loads(data).get('choices', [{}])[0]
+            return choice.get('delta', {}).get('content') or ""
+        except (json.JSONDecodeError, IndexError, AttributeError):
+            return ""
+    
     def _fallback_response(self, error: str) -> Dict:
         """Provides a generic fallback response."""
         return {
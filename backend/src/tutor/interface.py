@@ -4,90 +4,339 @@ This module provides a single entry point for the Gradio UI to interact with the
 It uses the structured `tutor` module for all AI-related tasks.
 """
 import os
+import asyncio
 import json
+import hashlib
 import logging
+import operator
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from dotenv import load_dotenv
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from langchain_community.vectorstores import FAISS
 
-from src.tutor.registry import create_agent, AGENT_CONFIGS
+from src.tutor.cache import LRUCache, SemanticCache
+from src.tutor.framework import euriai_framework, is_answer
+from src.tutor.registry import agent_for_subject, create_agent
+from src.tutor.retrieval import SyllabusIndex
 from src.utils.euriai_embeddings import EuriaiEmbeddings
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+QUIZ_PROMPT = """
+        Create a {num_questions}-question multiple-choice quiz for a {grade} grade student on the subject of {subject}.
+        The quiz complexity should be reasoning.
+        For each question, provide:
+        - "question": The question text.
+        - "options": A list of 4 possible answers.
+        - "correct_answer": The index (0-3) of the correct answer in the options list.
+        - "explanation": A brief, kid-friendly explanation for why the answer is correct.
+        
+        Return the quiz as a valid JSON list of objects only. Do not include any other text or formatting.
+        """
+ROADMAP_PROMPT = "Create a learning roadmap for a {grade} student studying {subject} for the {board} board."
+
+# Output-token ceilings per use: generation time grows with the tokens produced
+CHAT_MAX_TOKENS = 1024
+ROADMAP_MAX_TOKENS = 2048
+QUIZ_TOKENS_PER_QUESTION = 300
+
+# Part of the quiz pool key, so editing the prompt retires quizzes made with the old one
+QUIZ_PROMPT_VERSION = hashlib.sha1(QUIZ_PROMPT.encode()).hexdigest()[:12]
+# Quizzes kept ready per (grade, subject, length), and how long one stays servable
+QUIZ_POOL_SIZE = 3
+# Background refills share this many generation threads, so prefetching can't flood the LLM API
+QUIZ_REFILL_WORKERS = 1
+QUIZ_TTL_SECONDS = 60 * 60
+# Inverted lists probed per query on IVF indexes; higher means better recall, slower search
+FAISS_NPROBE = 16
+
+# Small talk and bare arithmetic are answered here instead of by the LLM
+LOCAL_REPLIES = {
+    "hi": "Hi there! 👋 Ready to explore {subject}? Ask me anything!",
+    "hello": "Hello! 😊 I'm your {subject} tutor. What would you like to learn today?",
+    "hey": "Hey! 👋 What {subject} question do you have for me?",
+    "good morning": "Good morning! ☀️ Let's learn some {subject} today!",
+    "good afternoon": "Good afternoon! 🌤️ What {subject} topic shall we look at?",
+    "good evening": "Good evening! 🌙 Ready for a little {subject}?",
+    "thanks": "You're welcome! 🌟 Keep up the great work!",
+    "thank you": "You're welcome! 🌟 Keep up the great work!",
+    "thx": "You're welcome! 🌟",
+    "ok": "Great! 👍 Ask me another question whenever you're ready.",
+    "okay": "Great! 👍 Ask me another question whenever you're ready.",
+    "bye": "Bye! 👋 Great learning with you today!",
+    "goodbye": "Goodbye! 👋 Come back soon to learn more {subject}!",
+}
+_ARITHMETIC = re.compile(
+    r"(?:what\s+is|what's|calculate|solve)?\s*(-?\d+(?:\.\d+)?)\s*([-+*/x×÷])\s*(-?\d+(?:\.\d+)?)\s*[=?]?\s*\??",
+    re.IGNORECASE,
+)
+_OPERATORS = {
+    "+": ("plus", operator.add), "-": ("minus", operator.sub),
+    "*": ("times", operator.mul), "x": ("times", operator.mul), "×": ("times", operator.mul),
+    "/": ("divided by", operator.truediv), "÷": ("divided by", operator.truediv),
+}
+
+def local_answer(message: str, subject: str) -> Optional[str]:
+    """A reply for a greeting or a single arithmetic operation, or None if the LLM is needed."""
+    text = message.strip()
+    reply = LOCAL_REPLIES.get(text.lower().rstrip("!.? "))
+    if reply is not None:
+        return reply.format(subject=subject)
+
+    match = _ARITHMETIC.fullmatch(text)
+    if match is None:
+        return None
+    left, symbol, right = match.groups()
+    name, apply = _OPERATORS[symbol.lower()]
+    if name == "divided by" and float(right) == 0:
+        return "Dividing by zero isn't possible, so there's no answer to that one! 🤔"
+    result = apply(float(left), float(right))
+    result = int(result) if result.is_integer() else round(result, 4)
+    return f"{left} {name} {right} is {result}! 🎉"
+
 class AI_Tutor:
     """The main interface for the AI Tutor application."""
 
-    def __init__(self, vector_store_path="data/vector_store/faiss_index"):
+    def __init__(self, vector_store_path="data/vector_store/faiss_index", roadmap_cache_path="data/cache/roadmaps.json",
+                 response_cache_path="data/cache/responses"):
         self.api_key = os.environ.get("EURIAI_API_KEY")
-        self.retriever = None
-        self.agents = {}
+        self.vector_store_path = vector_store_path
+        self.embeddings = None
+        self.response_cache = None
+        self.response_cache_path = response_cache_path
+        self.roadmap_cache = LRUCache(max_entries=256)
+        self.roadmap_cache_path = roadmap_cache_path
+        self._roadmap_save_lock = threading.Lock()
+        self._quiz_pool: Dict[tuple, deque] = {}
+        self._quiz_refilling = set()
+        self._quiz_lock = threading.Lock()
+        self._quiz_refill_executor = ThreadPoolExecutor(max_workers=QUIZ_REFILL_WORKERS, thread_name_prefix="quiz-refill")
+        self._local_answers = 0
+        # The vector store and agents are loaded on first use, not at construction
+        self._retriever_lock = threading.Lock()
+        self._agents = {}
+        self._agents_lock = threading.Lock()
 
-        if self.api_key and os.path.exists(vector_store_path):
-            try:
-                embeddings = EuriaiEmbeddings(model="gemini-embedding-001")
-                vector_store = FAISS.load_local(vector_store_path, embeddings, allow_dangerous_deserialization=True)
-                self.retriever = vector_store.as_retriever(search_kwargs={"k": 5})
-            except Exception as e:
-                logger.error(f"Error loading vector store: {e}")
+        self._load_roadmap_cache()
+
+        if self.api_key:
+            self.embeddings = EuriaiEmbeddings(model="gemini-embedding-001")
+            self.response_cache = SemanticCache(self.embeddings.embed_query)
+            self.response_cache.load(response_cache_path)
+
+    @cached_property
+    def retriever(self):
+        """The syllabus retriever, loaded from disk on first access (None if there is no usable index)."""
+        with self._retriever_lock:
+            # Another thread may have finished loading while this one waited
+            if "retriever" in self.__dict__:
+                return self.__dict__["retriever"]
+
+            retriever = None
+            if self.embeddings and os.path.exists(self.vector_store_path):
+                try:
+                    vector_store = FAISS.load_local(self.vector_store_path, self.embeddings, allow_dangerous_deserialization=True)
+                    # IVF indexes (built by setup.py for large corpora) trade recall for speed via nprobe
+                    if hasattr(vector_store.index, "nprobe"):
+                        vector_store.index.nprobe = FAISS_NPROBE
+                    retriever = SyllabusIndex(vector_store, k=5)
+                except Exception as e:
+                    logger.error(f"Error loading vector store: {e}")
+            logger.info(f"🤖 AI Tutor System: {'✅ Ready' if retriever is not None else '❌ Not Ready'}")
+            return retriever
+
+    @property
+    def retriever_loaded(self) -> bool:
+        """Whether the retriever has been loaded, without triggering the load."""
+        return "retriever" in self.__dict__
+
+    def warm_up(self):
+        """Runs one retrieval so the index, the embeddings connection and the first search are paid off-request."""
+        try:
+            if self.retriever:
+                self.retriever.invoke("warmup")
+        except Exception as e:
+            logger.error(f"Tutor warm-up failed: {e}")
 
-        for agent_type in AGENT_CONFIGS.keys():
-            self.agents[agent_type] = create_agent(agent_type, self.retriever)
+    def _agent(self, agent_type: str):
+        """Returns the agent for agent_type, creating it on first use."""
+        agent = self._agents.get(agent_type)
+        if agent is None:
+            retriever = self.retriever
+            with self._agents_lock:
+                agent = self._agents.get(agent_type)
+                if agent is None:
+                    agent = self._agents[agent_type] = create_agent(agent_type, retriever)
+        return agent
 
     def _get_agent_for_subject(self, subject: str) -> Optional[object]:
         """Selects the best agent based on the subject."""
-        subject_map = {
-            "science": "science_tutor",
-            "math": "math_tutor",
-            "social studies": "social_tutor",
-            "english": "english_tutor",
-        }
-        agent_key = subject_map.get(subject.lower(), "learning_coordinator")
-        return self.agents.get(agent_key)
+        return self._agent(agent_for_subject(subject))
 
     def generate_learning_roadmap(self, grade: str, board: str, subject: str) -> str:
         """Generates a personalized learning roadmap using a specialized agent."""
         if not self.retriever:
             return "The AI Tutor is not fully initialized. Please run the setup process."
 
+        key = (grade, board, subject)
+        cached = self.roadmap_cache.get(key)
+        if cached is not None:
+            return cached
+
+        agent = self._get_agent_for_subject(subject)
+        query = ROADMAP_PROMPT.format(grade=grade, subject=subject, board=board)
+        
+        result = agent.generate(
+            user_input=query,
+            subject=subject,
+            grade=grade,
+            complexity="complex",
+            max_tokens=ROADMAP_MAX_TOKENS
+        )
+        if result["success"]:
+            self.roadmap_cache.put(key, result["response"])
+            self._save_roadmap_cache()
+        return result["response"]
+
+    async def agenerate_learning_roadmap(self, grade: str, board: str, subject: str) -> str:
+        """Async version of generate_learning_roadmap: the long generation doesn't hold a worker thread."""
+        if not await asyncio.to_thread(lambda: self.retriever):
+            return "The AI Tutor is not fully initialized. Please run the setup process."
+
+        key = (grade, board, subject)
+        cached = self.roadmap_cache.get(key)
+        if cached is not None:
+            return cached
+
         agent = self._get_agent_for_subject(subject)
-        query = f"Create a learning roadmap for a {grade} student studying {subject} for the {board} board."
+        query = ROADMAP_PROMPT.format(grade=grade, subject=subject, board=board)
         
-        return agent.process_request(
+        result = await agent.agenerate(
             user_input=query,
             subject=subject,
             grade=grade,
-            complexity="complex"
+            complexity="complex",
+            max_tokens=ROADMAP_MAX_TOKENS
         )
+        if result["success"]:
+            self.roadmap_cache.put(key, result["response"])
+            await asyncio.to_thread(self._save_roadmap_cache)
+        return result["response"]
+
+    def has_cached_roadmap(self, grade: str, board: str, subject: str) -> bool:
+        """Whether a roadmap for this selection can be served without calling the AI."""
+        return (grade, board, subject) in self.roadmap_cache
+
+    def _load_roadmap_cache(self):
+        """Restores roadmaps saved by earlier runs, so re-opened subjects load instantly after a restart."""
+        if not os.path.exists(self.roadmap_cache_path):
+            return
+        try:
+            with open(self.roadmap_cache_path, encoding="utf-8") as f:
+                for key, roadmap in json.load(f):
+                    self.roadmap_cache.put(tuple(key), roadmap)
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Error loading roadmap cache: {e}")
+
+    def _save_roadmap_cache(self):
+        """Writes the roadmap cache atomically; roadmaps change rarely, so the whole file is rewritten."""
+        tmp_path = f"{self.roadmap_cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.roadmap_cache_path) or ".", exist_ok=True)
+            with self._roadmap_save_lock:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.roadmap_cache.items(), f, ensure_ascii=False)
+                os.replace(tmp_path, self.roadmap_cache_path)
+        except OSError as e:
+            logger.error(f"Error saving roadmap cache: {e}")
+
+    def generate_quiz(self, grade: str, subject: str, num_questions: int = 5, force_fresh: bool = False) -> Optional[List[Dict]]:
+        """Returns a quiz for the selection, served from the prefetched pool when one is ready."""
+        key = (grade, subject, num_questions, QUIZ_PROMPT_VERSION)
+        quiz = None if force_fresh else self._take_pooled_quiz(key)
+        if quiz is None:
+            quiz = self._generate_quiz(grade, subject, num_questions)
+            if quiz is None:
+                return None
+        if not force_fresh:
+            self._refill_quiz_pool(key, grade, subject, num_questions)
+        return quiz
+
+    def _take_pooled_quiz(self, key: tuple) -> Optional[List[Dict]]:
+        """Pops the oldest prefetched quiz that hasn't expired."""
+        with self._quiz_lock:
+            pool = self._quiz_pool.get(key)
+            while pool:
+                created, quiz = pool.popleft()
+                if time.monotonic() - created < QUIZ_TTL_SECONDS:
+                    return quiz
+        return None
+
+    def _refill_quiz_pool(self, key: tuple, grade: str, subject: str, num_questions: int):
+        """Tops the selection's pool back up to QUIZ_POOL_SIZE on the refill executor, one refill per selection."""
+        with self._quiz_lock:
+            if key in self._quiz_refilling:
+                return
+            self._quiz_refilling.add(key)
+
+        def refill():
+            try:
+                while True:
+                    with self._quiz_lock:
+                        pool = self._quiz_pool.setdefault(key, deque(maxlen=QUIZ_POOL_SIZE))
+                        if len(pool) >= QUIZ_POOL_SIZE:
+                            return
+                    quiz = self._generate_quiz(grade, subject, num_questions)
+                    if quiz is None:
+                        return
+                    with self._quiz_lock:
+                        pool.append((time.monotonic(), quiz))
+            finally:
+                with self._quiz_lock:
+                    self._quiz_refilling.discard(key)
+
+        try:
+            self._quiz_refill_executor.submit(refill)
+        except RuntimeError:
+            # The executor is shut down; the pool just isn't topped up
+            with self._quiz_lock:
+                self._quiz_refilling.discard(key)
 
-    def generate_quiz(self, grade: str, subject: str, num_questions: int = 5) -> Optional[List[Dict]]:
+    def close(self):
+        """Drops queued quiz refills so shutdown doesn't wait on them, and closes the pooled connections."""
+        self._quiz_refill_executor.shutdown(wait=False, cancel_futures=True)
+        euriai_framework.close()
+
+    async def aclose(self):
+        """Closes the async HTTP session shared by the agents."""
+        await euriai_framework.aclose()
+
+    def _generate_quiz(self, grade: str, subject: str, num_questions: int) -> Optional[List[Dict]]:
         """Generates a quiz using the specialized agent for the selected subject."""
         agent = self._get_agent_for_subject(subject)
         if not agent:
             logger.error(f"No agent found for subject: {subject}")
             return None
 
-        prompt = f"""
-        Create a {num_questions}-question multiple-choice quiz for a {grade} grade student on the subject of {subject}.
-        The quiz complexity should be reasoning.
-        For each question, provide:
-        - "question": The question text.
-        - "options": A list of 4 possible answers.
-        - "correct_answer": The index (0-3) of the correct answer in the options list.
-        - "explanation": A brief, kid-friendly explanation for why the answer is correct.
-        
-        Return the quiz as a valid JSON list of objects only. Do not include any other text or formatting.
-        """
+        prompt = QUIZ_PROMPT.format(num_questions=num_questions, grade=grade, subject=subject)
         
         try:
-            response = agent.process_request(
+            # Uncached: each pooled quiz should be a different one
+            response = agent.generate(
                 user_input=prompt,
                 subject=subject,
                 grade=grade,
-                complexity="reasoning"
-            )
+                complexity="reasoning",
+                max_tokens=min(4096, QUIZ_TOKENS_PER_QUESTION * num_questions + 256),
+                use_cache=False
+            )["response"]
             return json.loads(response)
         except (json.JSONDecodeError, TypeError) as e:
             logger.error(f"Error parsing AI quiz response: {e}\nResponse was: {response}")
@@ -98,13 +347,162 @@ class AI_Tutor:
 
     def chat_with_tutor(self, message: str, subject: str, grade: str) -> str:
         """Handles chat interactions with the appropriate specialized tutor."""
+        local = self._local_answer(message, subject)
+        if local is not None:
+            return local
+
+        namespace = (subject.lower(), grade)
+        cached, vector = self._lookup_cached_reply(namespace, message)
+        if cached is not None:
+            return cached
+
         agent = self._get_agent_for_subject(subject)
-        return agent.process_request(
+        result = agent.generate(
             user_input=message,
             subject=subject,
             grade=grade,
-            complexity="medium"
+            complexity="medium",
+            max_tokens=CHAT_MAX_TOKENS
         )
+        if result["success"]:
+            self._remember_reply(namespace, message, vector, result["response"])
+        return result["response"]
+
+    def prefetch_chat_context(self, message: str, subject: str):
+        """Embeds a question still being typed and searches the syllabus for it, so sending it hits both memos."""
+        if not self.retriever:
+            return
+        try:
+            self.embeddings.embed_query(message)
+            self.retriever.invoke(message, subject)
+        except Exception as e:
+            logger.error(f"Chat prefetch failed: {e}")
+
+    def chat_with_tutor_stream(self, message: str, subject: str, grade: str) -> Iterator[str]:
+        """Streams the tutor's reply chunk-by-chunk so the UI can render it as it arrives."""
+        local = self._local_answer(message, subject)
+        if local is not None:
+            yield local
+            return
+
+        namespace = (subject.lower(), grade)
+        cached, vector = self._lookup_cached_reply(namespace, message)
+        if cached is not None:
+            yield cached
+            return
+
+        agent = self._get_agent_for_subject(subject)
+        chunks = []
+        succeeded = yield from _collect(agent.stream_request(
+            user_input=message,
+            subject=subject,
+            grade=grade,
+            complexity="medium",
+            max_tokens=CHAT_MAX_TOKENS
+        ), chunks)
+        if succeeded:
+            self._remember_reply(namespace, message, vector, "".join(chunks))
+
+    async def achat_with_tutor_stream(self, message: str, subject: str, grade: str) -> AsyncIterator[str]:
+        """Async version of chat_with_tutor_stream: the stream is read on the event loop, not in a worker thread."""
+        local = self._local_answer(message, subject)
+        if local is not None:
+            yield local
+            return
+
+        namespace = (subject.lower(), grade)
+        cached, vector = await asyncio.to_thread(self._lookup_cached_reply, namespace, message)
+        if cached is not None:
+            yield cached
+            return
+
+        agent = self._get_agent_for_subject(subject)
+        chunks = []
+        outcome = {}
+        async for chunk in agent.astream_request(
+            user_input=message,
+            subject=subject,
+            grade=grade,
+            complexity="medium",
+            max_tokens=CHAT_MAX_TOKENS,
+            outcome=outcome
+        ):
+            chunks.append(chunk)
+            yield chunk
+        if outcome.get("success"):
+            await asyncio.to_thread(self._remember_reply, namespace, message, vector, "".join(chunks))
+
+    def chat_with_tutor_batch(self, requests: List[Tuple[str, str, str]], max_workers: int = 4) -> List[str]:
+        """Answers several (message, subject, grade) chats concurrently; identical requests are answered once."""
+        unique = list(dict.fromkeys(requests))
+        self._prefetch_contexts([(message, subject) for message, subject, _ in unique])
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique)))) as executor:
+            replies = dict(zip(unique, executor.map(lambda r: self.chat_with_tutor(*r), unique)))
+        return [replies[r] for r in requests]
+
+    def _prefetch_contexts(self, requests: List[Tuple[str, str]]):
+        """Embeds and searches a batch's (message, subject) pairs together; the agents' own lookups then hit the memo."""
+        if len(requests) < 2 or not self.retriever:
+            return
+        by_subject: Dict[str, List[str]] = {}
+        for message, subject in requests:
+            by_subject.setdefault(subject, []).append(message)
+        try:
+            # One embedding request for the whole batch, then one index search per subject
+            self.embeddings.embed_queries([message for message, _ in requests])
+            for subject, messages in by_subject.items():
+                self.retriever.batch_search(messages, subject)
+        except Exception as e:
+            logger.error(f"Batched syllabus search failed: {e}")
+
+    def save_response_cache(self):
+        """Persists cached chat answers so the next start is warm."""
+        if not self.response_cache:
+            return
+        try:
+            self.response_cache.save(self.response_cache_path)
+        except OSError as e:
+            logger.error(f"Error saving response cache: {e}")
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counts for the chat caches, the number of cached roadmaps and of locally answered chats."""
+        return {
+            "responses": self.response_cache.stats() if self.response_cache else None,
+            "roadmaps": len(self.roadmap_cache),
+            "completions": euriai_framework.response_cache.stats(),
+            "local_answers": self._local_answers,
+        }
+
+    def _local_answer(self, message: str, subject: str) -> Optional[str]:
+        reply = local_answer(message, subject)
+        if reply is not None:
+            self._local_answers += 1
+        return reply
+
+    def _remember_reply(self, namespace: tuple, message: str, vector, reply: str):
+        """Stores a chat reply for near-duplicate questions; empty and "Error..." replies are never kept."""
+        if self.response_cache and is_answer(reply):
+            self.response_cache.store(namespace, message, vector, reply)
+
+    def _lookup_cached_reply(self, namespace: tuple, message: str):
+        """Checks the semantic cache for a near-duplicate question already answered in this grade/subject."""
+        if not self.response_cache:
+            return None, None
+        try:
+            return self.response_cache.lookup(namespace, message)
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed: {e}")
+            return None, None
+
+def _collect(stream, chunks: List[str]):
+    """Re-yields a response stream while recording its chunks; returns the stream's result."""
+    while True:
+        try:
+            chunk = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        chunks.append(chunk)
+        yield chunk
 
 # Global instance for the application to use
 tutor_interface = AI_Tutor()
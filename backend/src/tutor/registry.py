@@ -3,7 +3,8 @@ Optimized Multi-Agent Configuration for Subject-Specific AI Tutors
 Uses intelligent model selection from available EuriAI models.
 """
 
-from typing import Dict
+import asyncio
+from typing import AsyncIterator, Dict, Generator
 from src.tutor.framework import euriai_framework
 
 # Optimized Agent Configurations with Available EuriAI Models
@@ -35,6 +36,26 @@ AGENT_CONFIGS = {
     },
 }
 
+# Prompt tokens drive time-to-first-token and cost, so retrieved context is capped
+MAX_CONTEXT_CHARS = 1200
+
+# Subject (lowercase) -> agent; anything else goes to the learning coordinator
+SUBJECT_TO_AGENT = {
+    "science": "science_tutor",
+    "math": "math_tutor",
+    "social studies": "social_tutor",
+    "english": "english_tutor",
+}
+# Also keyed by the spellings the frontend sends ("Math", "Social Studies"), so the usual subjects resolve without lowercasing
+_SUBJECT_LOOKUP = {**{subject.title(): agent for subject, agent in SUBJECT_TO_AGENT.items()}, **SUBJECT_TO_AGENT}
+
+def agent_for_subject(subject: str) -> str:
+    """The agent type for a subject, or the learning coordinator for subjects without an expert."""
+    agent_type = _SUBJECT_LOOKUP.get(subject)
+    if agent_type is None:
+        agent_type = SUBJECT_TO_AGENT.get(subject.lower(), "learning_coordinator")
+    return agent_type
+
 class SubjectExpert:
     """A streamlined agent that uses the EuriaiModelFramework for all AI interactions."""
     
@@ -42,50 +63,107 @@ class SubjectExpert:
         if agent_type not in AGENT_CONFIGS:
             raise ValueError(f"Unknown agent type: {agent_type}")
         
+        self.agent_type = agent_type
         self.config = AGENT_CONFIGS[agent_type]
         self.retriever = retriever
+        # Built once and kept first in every prompt: providers that cache prompt
+        # prefixes can then reuse it across all requests to this agent.
+        self.prompt_prefix = (
+            f"**Role:** {self.config['role']}\n"
+            f"**Goal:** {self.config['goal']}\n"
+            "**Task:** Respond to the student's request below.\n"
+        )
     
     def get_context(self, query: str, subject: str = None) -> str:
-        """Gets relevant context from the retriever, if available."""
+        """Gets relevant context from the retriever, if available: distinct chunks, capped at MAX_CONTEXT_CHARS."""
         if not self.retriever:
             return ""
         
         try:
-            docs = self.retriever.invoke(query)
-            if subject:
-                docs = [doc for doc in docs if doc.metadata.get('subject', '').lower() == subject.lower()]
+            # The search itself is limited to the subject's chunks
+            docs = self.retriever.invoke(query, subject)
             
-            return "\n".join([doc.page_content for doc in docs[:3]])
+            # Overlapping chunks often repeat each other; send each text once
+            snippets = list(dict.fromkeys(doc.page_content for doc in docs))[:3]
+            return "\n".join(snippets)[:MAX_CONTEXT_CHARS]
         except Exception:
             return "" # Return empty string on error
     
-    def process_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium") -> str:
-        """Processes a request using the Euriai framework with appropriate context and prompting."""
+    def _build_prompt(self, user_input: str, context: str) -> str:
+        """Constructs a detailed prompt that guides the AI; only the tail varies per request."""
+        return (
+            f"{self.prompt_prefix}\n"
+            f"**Syllabus Context (if relevant):**\n{context}\n\n"
+            f"**Student's Request:**\n{user_input}\n"
+        )
+    
+    def generate(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium", max_tokens: int = 4096, use_cache: bool = True) -> Dict:
+        """Processes a request and returns the framework's full result (response, model, success)."""
         
         context = self.get_context(context_query or user_input, subject) if self.retriever else ""
         
-        # Construct a detailed prompt that guides the AI
-        enhanced_prompt = f"""
-        **Role:** {self.config['role']}
-        **Goal:** {self.config['goal']}
-        **Task:** Respond to the student's request below.
-        
-        **Syllabus Context (if relevant):**
-        {context}
+        return euriai_framework.generate_response(
+            prompt=self._build_prompt(user_input, context),
+            task_type=self.config.get("task_type", "chat"),
+            complexity=complexity,
+            subject=subject or self.config.get("task_type"),
+            grade=grade,
+            max_tokens=max_tokens,
+            use_cache=use_cache
+        )
+    
+    async def agenerate(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium", max_tokens: int = 4096, use_cache: bool = True) -> Dict:
+        """Async version of generate; the retrieval runs in a worker thread, the API call on the event loop."""
         
-        **Student's Request:**
-        {user_input}
-        """
+        context = await asyncio.to_thread(self.get_context, context_query or user_input, subject) if self.retriever else ""
         
-        result = euriai_framework.generate_response(
-            prompt=enhanced_prompt,
+        return await euriai_framework.agenerate_response(
+            prompt=self._build_prompt(user_input, context),
             task_type=self.config.get("task_type", "chat"),
             complexity=complexity,
             subject=subject or self.config.get("task_type"),
-            grade=grade
+            grade=grade,
+            max_tokens=max_tokens,
+            use_cache=use_cache
         )
+    
+    async def aprocess_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium") -> str:
+        """Async version of process_request."""
+        return (await self.agenerate(user_input, context_query, subject, grade, complexity))["response"]
+    
+    def process_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium") -> str:
+        """Processes a request using the Euriai framework with appropriate context and prompting."""
+        return self.generate(user_input, context_query, subject, grade, complexity)["response"]
+    
+    def stream_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium", max_tokens: int = 4096) -> Generator[str, None, bool]:
+        """Like process_request, but yields the response incrementally; returns whether the model answered."""
         
-        return result["response"]
+        context = self.get_context(context_query or user_input, subject) if self.retriever else ""
+        
+        return (yield from euriai_framework.generate_response_stream(
+            prompt=self._build_prompt(user_input, context),
+            task_type=self.config.get("task_type", "chat"),
+            complexity=complexity,
+            subject=subject or self.config.get("task_type"),
+            grade=grade,
+            max_tokens=max_tokens
+        ))
+
+    async def astream_request(self, user_input: str, context_query: str = None, subject: str = None, grade: str = "6th", complexity: str = "medium", max_tokens: int = 4096, outcome: Dict = None) -> AsyncIterator[str]:
+        """Async version of stream_request; whether the model answered is written to outcome["success"]."""
+        
+        context = await asyncio.to_thread(self.get_context, context_query or user_input, subject) if self.retriever else ""
+        
+        async for chunk in euriai_framework.astream_response(
+            prompt=self._build_prompt(user_input, context),
+            task_type=self.config.get("task_type", "chat"),
+            complexity=complexity,
+            subject=subject or self.config.get("task_type"),
+            grade=grade,
+            max_tokens=max_tokens,
+            outcome=outcome
+        ):
+            yield chunk
 
 def create_agent(agent_type: str, retriever=None) -> SubjectExpert:
     """Factory function to create subject expert agents."""
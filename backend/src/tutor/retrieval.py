@@ -0,0 +1,101 @@
+"""
+Syllabus search over the FAISS vector store
+Searches the index directly so several queries share one embedding request and one index search.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from src.tutor.cache import LRUCache
+
+class SyllabusIndex:
+    """A retriever over a FAISS store that can answer a batch of queries with a single index search.
+
+    Results are memoized per (query, subject), so a batch search done ahead of time
+    (e.g. for a batch of chats) makes the agents' later single-query lookups free.
+    A subject restricts the search itself to that subject's chunks, instead of
+    filtering the top k afterwards and losing matches.
+    """
+
+    def __init__(self, vector_store: FAISS, k: int = 5, max_cached_queries: int = 512):
+        self.vector_store = vector_store
+        self.k = k
+        self._results = LRUCache(max_entries=max_cached_queries)
+        self._subject_params: Optional[Dict[str, faiss.SearchParameters]] = None
+        self._subject_params_lock = threading.Lock()
+
+    def _search_params(self, subject: str) -> Optional[faiss.SearchParameters]:
+        """Search parameters selecting only the subject's vectors (None if it has none), built on first use."""
+        if self._subject_params is None:
+            with self._subject_params_lock:
+                if self._subject_params is None:
+                    ids_by_subject: Dict[str, List[int]] = {}
+                    for i, doc_id in self.vector_store.index_to_docstore_id.items():
+                        document = self.vector_store.docstore.search(doc_id)
+                        if isinstance(document, Document):
+                            ids_by_subject.setdefault(document.metadata.get("subject", "").lower(), []).append(i)
+                    index = self.vector_store.index
+                    params = {}
+                    for name, ids in ids_by_subject.items():
+                        selector = faiss.IDSelectorBatch(np.asarray(ids, dtype=np.int64))
+                        # IVF parameters replace the index's own nprobe, so it is carried over
+                        params[name] = (faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+                                        if hasattr(index, "nprobe") else faiss.SearchParameters(sel=selector))
+                    self._subject_params = params
+        return self._subject_params.get(subject.lower())
+
+    def _embed(self, queries: List[str]) -> List[List[float]]:
+        embeddings = self.vector_store.embeddings
+        embed_queries = getattr(embeddings, "embed_queries", None)
+        if embed_queries is not None:
+            vectors = embed_queries(queries)
+        elif len(queries) == 1:
+            vectors = [embeddings.embed_query(queries[0])]
+        else:
+            vectors = embeddings.embed_documents(queries)
+        return vectors
+
+    def _documents(self, ids: np.ndarray) -> List[Document]:
+        documents = []
+        for i in ids:
+            # FAISS pads with -1 when fewer than k vectors match
+            if i < 0:
+                continue
+            document = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(i)])
+            if isinstance(document, Document):
+                documents.append(document)
+        return documents
+
+    def batch_search(self, queries: List[str], subject: Optional[str] = None) -> List[List[Document]]:
+        """The k nearest syllabus chunks for each query, optionally only from one subject.
+
+        Uncached queries are embedded and searched together.
+        """
+        params = None
+        if subject:
+            params = self._search_params(subject)
+            if params is None:
+                return [[] for _ in queries]
+
+        results = {query: self._results.get((query, subject)) for query in dict.fromkeys(queries)}
+        missing = [query for query, documents in results.items() if documents is None]
+        if missing:
+            # A failed embedding comes back empty; those queries find nothing and aren't memoized
+            embedded = [(query, vector) for query, vector in zip(missing, self._embed(missing)) if len(vector) == self.vector_store.index.d]
+            results.update((query, []) for query in missing)
+            if embedded:
+                matrix = np.asarray([vector for _, vector in embedded], dtype=np.float32)
+                _, ids = self.vector_store.index.search(matrix, self.k, params=params)
+                for (query, _), row in zip(embedded, ids):
+                    results[query] = self._documents(row)
+                    self._results.put((query, subject), results[query])
+        return [results[query] for query in queries]
+
+    def invoke(self, query: str, subject: Optional[str] = None) -> List[Document]:
+        """LangChain-retriever-compatible single search."""
+        return self.batch_search([query], subject)[0]
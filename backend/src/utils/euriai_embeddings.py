@@ -1,23 +1,33 @@
 import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
 from typing import List
 from langchain_core.embeddings import Embeddings
 
 class EuriaiEmbeddings(Embeddings):
     """Euriai API embeddings for LangChain."""
     
-    def __init__(self, model: str = "gemini-embedding-001"):
+    def __init__(self, model: str = "gemini-embedding-001", query_cache_size: int = 512, batch_size: int = 64):
         self.api_key = os.environ.get("EURIAI_API_KEY")
         if not self.api_key:
             raise ValueError("EURIAI_API_KEY not found in .env file")
         self.model = model
+        self.query_cache_size = query_cache_size
+        self.batch_size = batch_size
+        self._query_cache = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # One pooled session so each embedding call reuses an open HTTPS connection
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+        self._session.headers["Authorization"] = f"Bearer {self.api_key}"
 
     def _embed(self, text: str) -> List[float]:
         """Get embedding for a single text."""
         try:
-            response = requests.post(
+            response = self._session.post(
                 "https://api.euron.one/api/v1/euri/embeddings",
-                headers={"Authorization": f"Bearer {self.api_key}"},
                 json={"input": text, "model": self.model}
             )
             response.raise_for_status()
@@ -26,10 +36,55 @@ class EuriaiEmbeddings(Embeddings):
             print(f"Embedding API error: {e}")
             return []
 
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple documents."""
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for several texts in one request, falling back to one request per text."""
+        try:
+            response = self._session.post(
+                "https://api.euron.one/api/v1/euri/embeddings",
+                json={"input": texts, "model": self.model}
+            )
+            response.raise_for_status()
+            data = sorted(response.json()['data'], key=lambda item: item.get('index', 0))
+            if len(data) == len(texts):
+                return [item['embedding'] for item in data]
+        except Exception as e:
+            print(f"Batch embedding API error, embedding one by one: {e}")
         return [self._embed(text) for text in texts]
 
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple documents, batch_size texts per request."""
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._embed_batch(texts[start:start + self.batch_size]))
+        return embeddings
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, fetching only the ones not already cached, in batched requests."""
+        with self._query_cache_lock:
+            cached = {text: self._query_cache[text] for text in texts if text in self._query_cache}
+        missing = list(dict.fromkeys(text for text in texts if text not in cached))
+        if missing:
+            fetched = dict(zip(missing, self.embed_documents(missing)))
+            with self._query_cache_lock:
+                for text, embedding in fetched.items():
+                    if embedding:
+                        self._query_cache[text] = embedding
+                        if len(self._query_cache) > self.query_cache_size:
+                            self._query_cache.popitem(last=False)
+            cached.update(fetched)
+        return [cached[text] for text in texts]
+
     def embed_query(self, text: str) -> List[float]:
-        """Embed a query."""
-        return self._embed(text)
+        """Embed a query, reusing recent results so one question is only embedded once per request."""
+        with self._query_cache_lock:
+            if text in self._query_cache:
+                self._query_cache.move_to_end(text)
+                return self._query_cache[text]
+
+        embedding = self._embed(text)
+        if embedding:
+            with self._query_cache_lock:
+                self._query_cache[text] = embedding
+                if len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return embedding
@@ -0,0 +1,103 @@
+"""
+Tests for the REST API's game logic (no AI calls are made).
+"""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager, so the lifespan (tutor warm-up, session file) doesn't run
+    return TestClient(api.app)
+
+def test_quiz_score_counts_matching_answers(client):
+    response = client.post("/calculate_quiz_score", json={"answers": [0, 1, 2, 3], "correct_answers": [0, 1, 3, 3]})
+    assert response.status_code == 200
+    assert response.json()["score"] == "3/4"
+    assert response.json()["percentage"] == 75
+    assert response.json()["coins_earned"] == 30
+
+def test_quiz_score_accepts_out_of_range_answers(client):
+    response = client.post("/calculate_quiz_score", json={"answers": [200, 1], "correct_answers": [1, 1]})
+    assert response.status_code == 200
+    assert response.json()["score"] == "1/2"
+
+def test_quiz_score_with_missing_answers(client):
+    response = client.post("/calculate_quiz_score", json={"answers": [1], "correct_answers": [1, 2]})
+    assert response.json()["score"] == "1/2"
+
+def test_quiz_score_with_no_questions(client):
+    response = client.post("/calculate_quiz_score", json={"answers": [], "correct_answers": []})
+    assert response.json()["score"] == "0/0"
+    assert response.json()["percentage"] == 0
+
+class FakeTutor:
+    """Stands in for the AI tutor, recording how many chat messages are being answered at once."""
+    
+    retriever = object()
+    
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+    
+    def chat_with_tutor_batch(self, requests, max_workers=4):
+        with self.lock:
+            self.in_flight += len(requests)
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= len(requests)
+        return [f"answer to {message}" for message, _, _ in requests]
+
+def test_chat_concurrency_is_capped_by_the_chat_queue(monkeypatch):
+    tutor = FakeTutor()
+    monkeypatch.setattr(api, "_tutor", tutor)
+    
+    async def chat_many():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            single = [http.post("/chat_with_tutor", json={"message": f"q{i}", "subject": "Math", "grade": "6th"}) for i in range(10)]
+            batch = http.post("/chat_with_tutor_batch", json={"requests": [{"message": f"b{i}", "subject": "Math", "grade": "6th"} for i in range(8)]})
+            return await asyncio.gather(*single, batch)
+    
+    *singles, batch = asyncio.run(chat_many())
+    assert [r.json()["response"] for r in singles] == [f"answer to q{i}" for i in range(10)]
+    assert batch.json()["responses"] == [f"answer to b{i}" for i in range(8)]
+    assert tutor.peak <= api.CHAT_QUEUE.concurrency_limit
+
+class FakeStreamingTutor:
+    retriever = object()
+    
+    async def achat_with_tutor_stream(self, message, subject, grade):
+        for word in ("Fractions ", "are ", "parts ", "of ", "a ", "whole."):
+            yield word
+
+def test_chat_stream_sends_the_whole_reply(client, monkeypatch):
+    monkeypatch.setattr(api, "_tutor", FakeStreamingTutor())
+    response = client.post("/chat_with_tutor_stream", json={"message": "fractions?", "subject": "Math", "grade": "6th"})
+    assert response.status_code == 200
+    assert response.text == "Fractions are parts of a whole."
+
+class FakePrefetchTutor:
+    retriever = object()
+    
+    def __init__(self):
+        self.prefetched = []
+    
+    def prefetch_chat_context(self, message, subject):
+        self.prefetched.append((message, subject))
+
+def test_prefetch_chat_warms_only_long_enough_drafts(client, monkeypatch):
+    tutor = FakePrefetchTutor()
+    monkeypatch.setattr(api, "_tutor", tutor)
+    assert client.post("/prefetch_chat", json={"message": "what is", "subject": "Math", "grade": "6th"}).status_code == 204
+    assert client.post("/prefetch_chat", json={"message": "what is a fraction", "subject": "Math", "grade": "6th"}).status_code == 204
+    assert tutor.prefetched == [("what is a fraction", "Math")]
@@ -0,0 +1,89 @@
+"""
+Tests for the tutor's in-memory caches.
+"""
+
+import json
+import threading
+import time
+
+import numpy as np
+
+from src.tutor.cache import LRUCache, SemanticCache, SingleFlight
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+def test_lru_cache_expires_entries_after_ttl():
+    cache = LRUCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.items() == []
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_cache_without_ttl_keeps_entries():
+    cache = LRUCache(max_entries=2)
+    cache.put(("6th", "CBSE", "Math"), "roadmap")
+    assert cache.items() == [(("6th", "CBSE", "Math"), "roadmap")]
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "answer"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert results == ["answer"] * 4
+    assert len(calls) == 1
+    assert flight.do("key", lambda: "again") == "again"
+
+def _semantic_cache():
+    return SemanticCache(lambda text: np.array([1.0, float(len(text))], dtype=np.float32))
+
+def test_semantic_cache_save_round_trips_and_overwrites_in_place(tmp_path):
+    cache = _semantic_cache()
+    for namespace in (("math", "6th"), ("science", "7th")):
+        _, vector = cache.lookup(namespace, "what is a prime?")
+        cache.store(namespace, "what is a prime?", vector, f"answer for {namespace[0]}")
+    cache.save(str(tmp_path))
+    cache.save(str(tmp_path))
+    assert len(list(tmp_path.glob("namespace_*"))) == 4
+    assert not list(tmp_path.glob("*.tmp"))
+
+    restored = _semantic_cache()
+    restored.load(str(tmp_path))
+    assert restored.lookup(("science", "7th"), "what is a prime?")[0] == "answer for science"
+
+def test_semantic_cache_load_skips_mismatched_files(tmp_path):
+    np.save(tmp_path / "namespace_torn.npy", np.ones((2, 2), dtype=np.float32))
+    (tmp_path / "namespace_torn.json").write_text(json.dumps({"namespace": ["math", "6th"], "texts": ["q"], "responses": ["a"]}))
+    cache = _semantic_cache()
+    cache.load(str(tmp_path))
+    assert cache.stats()["semantic_entries"] == 0
+    cache.save(str(tmp_path))
+    assert not list(tmp_path.glob("namespace_*"))
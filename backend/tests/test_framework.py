@@ -0,0 +1,120 @@
+"""
+Tests that failed completions are reported as failures and never cached (the HTTP call is replaced by a stub).
+"""
+
+import asyncio
+
+import numpy as np
+
+from src.tutor.cache import SemanticCache
+from src.tutor.framework import euriai_framework
+from src.tutor.interface import AI_Tutor
+
+EMPTY_COMPLETION = {"choices": [{"message": {"content": ""}, "finish_reason": "stop"}]}
+
+class FakeHTTPResponse:
+    def __init__(self, payload):
+        self.payload = payload
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self.payload
+
+class FrameworkAgent:
+    """Stands in for a subject expert, going straight to the framework without syllabus context."""
+    
+    def generate(self, user_input, subject=None, grade="6th", complexity="medium", max_tokens=4096, use_cache=True):
+        return euriai_framework.generate_response(prompt=user_input, subject=subject, grade=grade,
+                                                  complexity=complexity, max_tokens=max_tokens, use_cache=use_cache)
+    
+    async def agenerate(self, user_input, subject=None, grade="6th", complexity="medium", max_tokens=4096, use_cache=True):
+        return await euriai_framework.agenerate_response(prompt=user_input, subject=subject, grade=grade,
+                                                         complexity=complexity, max_tokens=max_tokens, use_cache=use_cache)
+
+class FakeAsyncHTTPResponse(FakeHTTPResponse):
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+    
+    async def json(self):
+        return self.payload
+
+class FakeAsyncSession:
+    def __init__(self, payload):
+        self.payload = payload
+    
+    def post(self, *args, **kwargs):
+        return FakeAsyncHTTPResponse(self.payload)
+
+def stub_completion(monkeypatch, payload):
+    monkeypatch.setattr(euriai_framework._sync_session, "post", lambda *args, **kwargs: FakeHTTPResponse(payload))
+
+def make_tutor(tmp_path, monkeypatch):
+    monkeypatch.delenv("EURIAI_API_KEY", raising=False)
+    tutor = AI_Tutor(vector_store_path=str(tmp_path / "missing"), roadmap_cache_path=str(tmp_path / "roadmaps.json"))
+    monkeypatch.setattr(tutor, "_get_agent_for_subject", lambda subject: FrameworkAgent())
+    return tutor
+
+def test_empty_completion_is_a_failure_and_not_cached(monkeypatch):
+    stub_completion(monkeypatch, EMPTY_COMPLETION)
+    result = euriai_framework.generate_response("an unanswered question", task_type="reasoning")
+    assert not result["success"]
+    assert result["response"].startswith("Error")
+    assert not any(value.startswith("Error") for _, value in euriai_framework.response_cache.items())
+
+def test_chat_error_reply_is_not_stored_in_the_semantic_cache(tmp_path, monkeypatch):
+    stub_completion(monkeypatch, EMPTY_COMPLETION)
+    tutor = make_tutor(tmp_path, monkeypatch)
+    tutor.response_cache = SemanticCache(lambda text: np.ones(4, dtype=np.float32))
+    assert tutor.chat_with_tutor("why is the sky blue?", "Science", "6th").startswith("Error")
+    assert tutor.response_cache.stats()["exact_entries"] == 0
+
+def test_roadmap_error_is_not_kept_in_memory(tmp_path, monkeypatch):
+    stub_completion(monkeypatch, {"choices": [{"message": {"content": None}, "finish_reason": "length"}]})
+    tutor = make_tutor(tmp_path, monkeypatch)
+    tutor.__dict__["retriever"] = object()
+    assert tutor.generate_learning_roadmap("6th", "CBSE", "Math").startswith("Error")
+    assert not tutor.has_cached_roadmap("6th", "CBSE", "Math")
+
+def test_roadmap_error_is_not_persisted(tmp_path, monkeypatch):
+    async def fake_session():
+        return FakeAsyncSession(EMPTY_COMPLETION)
+    monkeypatch.setattr(euriai_framework, "_session", fake_session)
+    tutor = make_tutor(tmp_path, monkeypatch)
+    tutor.__dict__["retriever"] = object()
+    roadmap = asyncio.run(tutor.agenerate_learning_roadmap("7th", "ICSE", "Science"))
+    assert roadmap.startswith("Error")
+    assert not tutor.has_cached_roadmap("7th", "ICSE", "Science")
+    assert not (tmp_path / "roadmaps.json").exists()
+
+class EmptyStreamAgent:
+    async def astream_request(self, user_input, subject=None, grade="6th", complexity="medium", max_tokens=4096, outcome=None):
+        outcome["success"] = True
+        return
+        yield
+
+def test_chat_stream_without_text_is_not_stored(tmp_path, monkeypatch):
+    tutor = make_tutor(tmp_path, monkeypatch)
+    monkeypatch.setattr(tutor, "_get_agent_for_subject", lambda subject: EmptyStreamAgent())
+    tutor.response_cache = SemanticCache(lambda text: np.ones(4, dtype=np.float32))
+    
+    async def read_stream():
+        return [chunk async for chunk in tutor.achat_with_tutor_stream("what are fractions?", "Math", "6th")]
+    
+    assert asyncio.run(read_stream()) == []
+    assert tutor.response_cache.stats()["exact_entries"] == 0
+
+def test_http_session_is_recreated_on_a_new_event_loop():
+    async def session_pair():
+        first, second = await euriai_framework._session(), await euriai_framework._session()
+        return first, second
+    
+    first, same = asyncio.run(session_pair())
+    assert first is same
+    later, _ = asyncio.run(session_pair())
+    assert later is not first
+    asyncio.run(euriai_framework.aclose())
@@ -0,0 +1,28 @@
+"""
+Tests for the chat replies answered without the LLM.
+"""
+
+from src.tutor.interface import AI_Tutor, local_answer
+
+def test_greetings_are_answered_locally():
+    assert "Math" in local_answer("Hello!", "Math")
+    assert local_answer("thank you", "Science").startswith("You're welcome")
+
+def test_simple_arithmetic_is_answered_locally():
+    assert local_answer("what is 2+2?", "Math") == "2 plus 2 is 4! 🎉"
+    assert local_answer("7 x 8", "Math") == "7 times 8 is 56! 🎉"
+    assert local_answer("10 / 4", "Math") == "10 divided by 4 is 2.5! 🎉"
+    assert "zero" in local_answer("5 / 0", "Math")
+
+def test_real_questions_go_to_the_llm():
+    assert local_answer("what is photosynthesis?", "Science") is None
+    assert local_answer("2 + 2 + 2", "Math") is None
+    assert local_answer("hi, can you explain fractions?", "Math") is None
+
+def test_local_answers_skip_the_agents_and_are_counted(tmp_path, monkeypatch):
+    monkeypatch.delenv("EURIAI_API_KEY", raising=False)
+    tutor = AI_Tutor(vector_store_path=str(tmp_path / "missing"), roadmap_cache_path=str(tmp_path / "roadmaps.json"))
+    monkeypatch.setattr(tutor, "_get_agent_for_subject", lambda subject: None)
+    assert tutor.chat_with_tutor("3 * 4", "Math", "6th") == "3 times 4 is 12! 🎉"
+    assert list(tutor.chat_with_tutor_stream("hi", "Math", "6th")) == [local_answer("hi", "Math")]
+    assert tutor.cache_stats()["local_answers"] == 2
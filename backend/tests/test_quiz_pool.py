@@ -0,0 +1,53 @@
+"""
+Tests for the AI tutor's prefetched quiz pool (the LLM call is replaced by a stub).
+"""
+
+import threading
+import time
+
+from src.tutor import interface
+from src.tutor.interface import AI_Tutor
+
+def make_tutor(tmp_path, monkeypatch):
+    monkeypatch.delenv("EURIAI_API_KEY", raising=False)
+    tutor = AI_Tutor(vector_store_path=str(tmp_path / "missing"), roadmap_cache_path=str(tmp_path / "roadmaps.json"))
+    tutor.calls = 0
+    tutor.in_flight = 0
+    tutor.peak = 0
+    lock = threading.Lock()
+
+    def fake_generate(grade, subject, num_questions):
+        with lock:
+            tutor.calls += 1
+            tutor.in_flight += 1
+            tutor.peak = max(tutor.peak, tutor.in_flight)
+        time.sleep(0.01)
+        with lock:
+            tutor.in_flight -= 1
+        return [{"question": f"{subject} question"}]
+
+    tutor._generate_quiz = fake_generate
+    return tutor
+
+def test_pooled_quiz_is_served_after_refill(tmp_path, monkeypatch):
+    tutor = make_tutor(tmp_path, monkeypatch)
+    assert tutor.generate_quiz("6th", "Math") == [{"question": "Math question"}]
+    tutor._quiz_refill_executor.shutdown(wait=True)
+    calls = tutor.calls
+    assert calls == 1 + interface.QUIZ_POOL_SIZE
+    assert tutor.generate_quiz("6th", "Math") == [{"question": "Math question"}]
+    assert tutor.calls == calls
+
+def test_refills_are_bounded_by_the_refill_executor(tmp_path, monkeypatch):
+    tutor = make_tutor(tmp_path, monkeypatch)
+    for subject in ("Math", "Science", "English", "Social Studies"):
+        tutor.generate_quiz("6th", subject)
+    tutor._quiz_refill_executor.shutdown(wait=True)
+    # The foreground generations run one at a time here, so the peak comes from refills alone
+    assert tutor.peak <= interface.QUIZ_REFILL_WORKERS + 1
+
+def test_force_fresh_does_not_refill(tmp_path, monkeypatch):
+    tutor = make_tutor(tmp_path, monkeypatch)
+    tutor.generate_quiz("6th", "Math", force_fresh=True)
+    tutor._quiz_refill_executor.shutdown(wait=True)
+    assert tutor.calls == 1
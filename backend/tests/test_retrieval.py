@@ -0,0 +1,46 @@
+"""
+Tests for batched syllabus search.
+"""
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.tutor.retrieval import SyllabusIndex
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+def make_store(embeddings):
+    texts = [f"chunk {i}" for i in range(20)]
+    return FAISS.from_texts(texts, embeddings, metadatas=[{"subject": "Math"} for _ in texts])
+
+def test_batch_search_matches_langchain_search():
+    store = make_store(DeterministicFakeEmbedding(size=16))
+    index = SyllabusIndex(store, k=3)
+    for query, documents in zip(["chunk 1", "chunk 2"], index.batch_search(["chunk 1", "chunk 2"])):
+        assert [d.page_content for d in documents] == [d.page_content for d in store.similarity_search(query, k=3)]
+
+def test_batch_search_embeds_once_and_memoizes():
+    embeddings = CountingEmbeddings(size=16)
+    index = SyllabusIndex(make_store(embeddings), k=3)
+    embeddings.calls = 0
+    first = index.batch_search(["chunk 1", "chunk 2", "chunk 1"])
+    assert embeddings.calls == 1
+    assert first[0] == first[2]
+    assert index.invoke("chunk 2") == first[1]
+    assert embeddings.calls == 1
+
+def test_subject_search_only_returns_that_subject():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    texts = [f"chunk {i}" for i in range(20)]
+    store = FAISS.from_texts(texts, embeddings, metadatas=[{"subject": "Math" if i % 2 else "Science"} for i in range(20)])
+    index = SyllabusIndex(store, k=3)
+    documents = index.invoke("chunk 4", "math")
+    assert len(documents) == 3
+    assert all(d.metadata["subject"] == "Math" for d in documents)
+    assert index.invoke("chunk 4", "History") == []
+    assert index.invoke("chunk 4")[0].page_content == "chunk 4"
@@ -0,0 +1,95 @@
+"""
+Tests for the session store's persistence.
+"""
+
+import threading
+import time
+
+import orjson
+import pytest
+
+import api
+from api import SessionStore
+
+def test_sessions_survive_a_save_and_load(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    store = SessionStore()
+    session_id, state = store.create()
+    state.add_coins(25)
+    state.unlocked_perks.append("Hint Helper 💡")
+    SessionStore.save(path, store.snapshot())
+
+    restored = SessionStore()
+    restored.load(path)
+    assert restored.get(session_id) == state
+
+def test_snapshot_is_not_affected_by_later_changes():
+    store = SessionStore()
+    session_id, state = store.create()
+    snapshot = store.snapshot()
+    state.spend_coins(50)
+    state.unlocked_perks.append("Golden Star Badge ⭐")
+    assert snapshot[session_id]["state"]["coins"] == 100
+    assert snapshot[session_id]["state"]["unlocked_perks"] == []
+
+def test_expired_sessions_are_not_loaded(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    store = SessionStore(ttl_seconds=60)
+    session_id, _ = store.create()
+    snapshot = store.snapshot()
+    snapshot[session_id]["last_used"] -= 120
+    SessionStore.save(path, snapshot)
+
+    restored = SessionStore(ttl_seconds=60)
+    restored.load(path)
+    assert restored.get(session_id) is None
+
+@pytest.mark.parametrize("content", [
+    b"[1, 2, 3]",
+    b'{"a": {"state": {}}}',
+    b'{"a": {"last_used": 0}}',
+    b'{"a": "not a session"}',
+    b'{"a": {"last_used": "soon", "state": {}}}',
+    b'{"a": {"last_used": 0, "state": {"coins": 5, "unknown_field": 1}}}',
+    b"not json",
+])
+def test_unreadable_session_files_are_skipped(tmp_path, content):
+    path = tmp_path / "sessions.json"
+    path.write_bytes(content)
+    store = SessionStore()
+    store.load(str(path))
+    assert store.get("a") is None
+
+def test_readable_sessions_load_alongside_broken_ones(tmp_path):
+    path = str(tmp_path / "sessions.json")
+    store = SessionStore()
+    session_id, _ = store.create()
+    snapshot = store.snapshot()
+    snapshot["broken"] = {"state": {}}
+    SessionStore.save(path, snapshot)
+
+    restored = SessionStore()
+    restored.load(path)
+    assert restored.get(session_id) is not None
+    assert orjson.loads(open(path, "rb").read()).keys() == {session_id, "broken"}
+
+def test_session_saves_never_overlap(tmp_path, monkeypatch):
+    active, overlaps = [], []
+    original_save = SessionStore.save
+
+    def slow_save(path, snapshot):
+        active.append(1)
+        overlaps.append(len(active) > 1)
+        time.sleep(0.02)
+        original_save(path, snapshot)
+        active.pop()
+
+    monkeypatch.setattr(api, "SESSION_STORE_PATH", str(tmp_path / "sessions.json"))
+    monkeypatch.setattr(SessionStore, "save", staticmethod(slow_save))
+    threads = [threading.Thread(target=api._save_sessions, args=({},)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [False] * 4
+    assert orjson.loads((tmp_path / "sessions.json").read_bytes()) == {}
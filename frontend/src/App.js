@@ -1,589 +1,96 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
+import './Tutor.css';
 
 // API Configuration
 const API_BASE_URL = 'http://localhost:8000';
+// Matches the backend's 50 ms chunk coalescing, so network bursts don't become render bursts
+const STREAM_RENDER_INTERVAL_MS = 50;
+// Once typing pauses this long, the draft question is sent ahead so its syllabus search is ready on send
+const CHAT_PREFETCH_DEBOUNCE_MS = 400;
+const CHAT_PREFETCH_MIN_CHARS = 8;
 
 const api = axios.create({
   baseURL: API_BASE_URL,
+  // Send the session cookie so coins and progress stay per student
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
 });
 
-// Modern, Beautiful UI Styles
-const styles = `
-@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800&family=Fredoka+One:wght@400&display=swap');
-
-* {
-    margin: 0;
-    padding: 0;
-    box-sizing: border-box;
-}
-
-body {
-    font-family: 'Poppins', sans-serif;
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    background-attachment: fixed;
-    min-height: 100vh;
-    line-height: 1.6;
-    overflow-x: hidden;
-}
-
-.container {
-    max-width: 1400px;
-    margin: 0 auto;
-    padding: 20px;
-    position: relative;
-}
-
-/* Floating particles animation */
-.container::before {
-    content: '';
-    position: fixed;
-    top: 0;
-    left: 0;
-    width: 100%;
-    height: 100%;
-    background: 
-        radial-gradient(circle at 20% 20%, rgba(255, 255, 255, 0.1) 1px, transparent 1px),
-        radial-gradient(circle at 80% 80%, rgba(255, 255, 255, 0.1) 1px, transparent 1px),
-        radial-gradient(circle at 40% 40%, rgba(255, 255, 255, 0.05) 2px, transparent 2px);
-    background-size: 50px 50px, 80px 80px, 120px 120px;
-    animation: float 20s ease-in-out infinite;
-    pointer-events: none;
-    z-index: -1;
-}
-
-@keyframes float {
-    0%, 100% { transform: translateY(0px) rotate(0deg); }
-    33% { transform: translateY(-20px) rotate(120deg); }
-    66% { transform: translateY(-10px) rotate(240deg); }
-}
-
-.main-title {
-    font-family: 'Fredoka One', cursive;
-    background: linear-gradient(135deg, #ff6b6b, #4ecdc4, #45b7d1, #96ceb4, #ffeaa7);
-    background-size: 300% 300%;
-    -webkit-background-clip: text;
-    -webkit-text-fill-color: transparent;
-    background-clip: text;
-    font-size: clamp(2rem, 5vw, 3.5rem);
-    font-weight: 800;
-    text-align: center;
-    margin: 30px 0;
-    animation: gradientFlow 3s ease-in-out infinite;
-    text-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    letter-spacing: 2px;
-}
-
-@keyframes gradientFlow {
-    0%, 100% { background-position: 0% 50%; }
-    50% { background-position: 100% 50%; }
-}
-
-/* Button Styles */
-.big-button {
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    color: white;
-    border-radius: 25px;
-    font-weight: 600;
-    font-size: 18px;
-    padding: 18px 35px;
-    border: none;
-    box-shadow: 
-        0 8px 32px rgba(102, 126, 234, 0.3),
-        inset 0 1px 0 rgba(255,255,255,0.2);
-    transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-    cursor: pointer;
-    position: relative;
-    overflow: hidden;
-    margin: 10px;
-    min-width: 180px;
-    text-transform: uppercase;
-    letter-spacing: 1px;
-    font-family: 'Poppins', sans-serif;
-}
-
-.big-button::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: -100%;
-    width: 100%;
-    height: 100%;
-    background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-    transition: left 0.5s;
-}
-
-.big-button:hover::before {
-    left: 100%;
-}
-
-.big-button:hover {
-    transform: translateY(-4px) scale(1.05);
-    box-shadow: 
-        0 12px 40px rgba(102, 126, 234, 0.4),
-        inset 0 1px 0 rgba(255,255,255,0.3);
-}
-
-.big-button:active {
-    transform: translateY(-2px) scale(1.02);
-}
-
-.success-button {
-    background: linear-gradient(135deg, #56ab2f 0%, #a8e6cf 100%);
-    color: white;
-    border-radius: 25px;
-    font-weight: 600;
-    font-size: 18px;
-    padding: 18px 35px;
-    border: none;
-    box-shadow: 
-        0 8px 32px rgba(86, 171, 47, 0.3),
-        inset 0 1px 0 rgba(255,255,255,0.2);
-    transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-    cursor: pointer;
-    margin: 10px;
-    min-width: 180px;
-    text-transform: uppercase;
-    letter-spacing: 1px;
-}
-
-.success-button:hover {
-    transform: translateY(-4px) scale(1.05);
-    box-shadow: 0 12px 40px rgba(86, 171, 47, 0.4);
-}
-
-.warning-button {
-    background: linear-gradient(135deg, #ff7f50 0%, #ff6b6b 100%);
-    color: white;
-    border-radius: 25px;
-    font-weight: 600;
-    font-size: 18px;
-    padding: 18px 35px;
-    border: none;
-    box-shadow: 
-        0 8px 32px rgba(255, 107, 107, 0.3),
-        inset 0 1px 0 rgba(255,255,255,0.2);
-    transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-    cursor: pointer;
-    margin: 10px;
-    min-width: 180px;
-    text-transform: uppercase;
-    letter-spacing: 1px;
-}
-
-.warning-button:hover {
-    transform: translateY(-4px) scale(1.05);
-    box-shadow: 0 12px 40px rgba(255, 107, 107, 0.4);
-}
-
-/* Card Styles */
-.kid-card {
-    background: rgba(255, 255, 255, 0.95);
-    backdrop-filter: blur(20px);
-    border-radius: 25px;
-    padding: 30px;
-    margin: 20px 10px;
-    box-shadow: 
-        0 20px 60px rgba(0,0,0,0.1),
-        inset 0 1px 0 rgba(255,255,255,0.8);
-    border: 1px solid rgba(255,255,255,0.2);
-    transition: all 0.4s ease;
-    position: relative;
-    overflow: hidden;
-}
-
-.kid-card::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    right: 0;
-    height: 4px;
-    background: linear-gradient(90deg, #667eea, #764ba2);
-    border-radius: 25px 25px 0 0;
-}
-
-.kid-card:hover {
-    transform: translateY(-8px);
-    box-shadow: 
-        0 30px 80px rgba(0,0,0,0.15),
-        inset 0 1px 0 rgba(255,255,255,0.9);
-}
-
-.coin-display {
-    background: linear-gradient(135deg, #f7971e 0%, #ffd200 100%);
-    color: #8B4513;
-    font-size: 28px;
-    font-weight: 700;
-    padding: 20px 30px;
-    border-radius: 50px;
-    text-align: center;
-    box-shadow: 
-        0 10px 30px rgba(247, 151, 30, 0.3),
-        inset 0 1px 0 rgba(255,255,255,0.3);
-    position: relative;
-    overflow: hidden;
-    animation: coinGlow 2s ease-in-out infinite alternate;
-    font-family: 'Fredoka One', cursive;
-    letter-spacing: 2px;
-}
-
-@keyframes coinGlow {
-    0% { box-shadow: 0 10px 30px rgba(247, 151, 30, 0.3); }
-    100% { box-shadow: 0 10px 40px rgba(247, 151, 30, 0.5); }
-}
-
-/* Tab Navigation */
-.tab-nav {
-    background: rgba(255, 255, 255, 0.1);
-    backdrop-filter: blur(10px);
-    color: white;
-    font-size: 16px;
-    font-weight: 600;
-    border-radius: 20px 20px 0 0;
-    padding: 15px 25px;
-    cursor: pointer;
-    transition: all 0.3s ease;
-    margin: 0 5px;
-    border: 1px solid rgba(255,255,255,0.1);
-    position: relative;
-    overflow: hidden;
-}
-
-.tab-nav::before {
-    content: '';
-    position: absolute;
-    bottom: 0;
-    left: 0;
-    width: 100%;
-    height: 3px;
-    background: linear-gradient(90deg, #667eea, #764ba2);
-    transform: scaleX(0);
-    transition: transform 0.3s ease;
-}
-
-.tab-nav:hover::before {
-    transform: scaleX(1);
-}
-
-.tab-nav.active {
-    background: rgba(255, 255, 255, 0.2);
-    backdrop-filter: blur(15px);
-    box-shadow: 0 8px 32px rgba(255,255,255,0.1);
-}
-
-.tab-nav.active::before {
-    transform: scaleX(1);
-}
-
-.quiz-card {
-    background: linear-gradient(135deg, rgba(255, 228, 225, 0.9), rgba(255, 240, 245, 0.9));
-    backdrop-filter: blur(10px);
-    border-radius: 20px;
-    padding: 25px;
-    margin: 15px 0;
-    box-shadow: 0 10px 40px rgba(255, 105, 180, 0.1);
-    border-left: 6px solid #ff69b4;
-    transition: all 0.3s ease;
-    cursor: pointer;
-}
-
-.quiz-card:hover {
-    transform: translateX(10px);
-    box-shadow: 0 15px 50px rgba(255, 105, 180, 0.2);
-}
-
-.attention-alert {
-    background: linear-gradient(135deg, #ff6b6b, #ee5a24);
-    color: white;
-    border-radius: 20px;
-    padding: 30px;
-    text-align: center;
-    font-size: 20px;
-    font-weight: 600;
-    animation: alertPulse 2s infinite;
-    box-shadow: 0 15px 50px rgba(255, 107, 107, 0.3);
-    border: 2px solid rgba(255,255,255,0.2);
-}
-
-@keyframes alertPulse {
-    0%, 100% { 
-        transform: scale(1);
-        box-shadow: 0 15px 50px rgba(255, 107, 107, 0.3);
-    }
-    50% { 
-        transform: scale(1.05);
-        box-shadow: 0 20px 60px rgba(255, 107, 107, 0.5);
-    }
-}
-
-.parent-lock {
-    background: linear-gradient(135deg, #8B4513, #A0522D);
-    color: white;
-    border-radius: 15px;
-    padding: 20px;
-    font-weight: 600;
-    box-shadow: 0 10px 30px rgba(139, 69, 19, 0.3);
-    transition: all 0.3s ease;
-}
-
-.parent-lock:hover {
-    transform: translateY(-2px);
-    box-shadow: 0 15px 40px rgba(139, 69, 19, 0.4);
-}
-
-.video-container {
-    border-radius: 25px;
-    overflow: hidden;
-    box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-    background: #000;
-    height: 450px;
-    position: relative;
-    border: 3px solid rgba(255,255,255,0.1);
-}
-
-.webcam-preview {
-    width: 250px;
-    height: 180px;
-    border-radius: 20px;
-    border: 3px solid rgba(102, 126, 234, 0.5);
-    background: linear-gradient(135deg, #000 0%, #333 100%);
-    color: white;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    text-align: center;
-    font-weight: 600;
-    box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-    margin: 20px auto;
-    transition: all 0.3s ease;
-}
-
-.webcam-preview:hover {
-    transform: scale(1.05);
-    border-color: rgba(102, 126, 234, 0.8);
-}
-
-/* Typography */
-h1, h2, h3 {
-    color: white;
-    font-weight: 700;
-    text-shadow: 0 2px 10px rgba(0,0,0,0.2);
-    margin-bottom: 20px;
-    font-family: 'Poppins', sans-serif;
-}
-
-h1 { font-size: clamp(2rem, 4vw, 3rem); }
-h2 { font-size: clamp(1.5rem, 3vw, 2.5rem); }
-h3 { font-size: clamp(1.2rem, 2.5vw, 2rem); }
-
-/* Input Styles */
-input, select {
-    background: rgba(255, 255, 255, 0.9);
-    border: 2px solid rgba(102, 126, 234, 0.3);
-    border-radius: 15px;
-    padding: 15px 20px;
-    font-size: 16px;
-    font-weight: 500;
-    width: 100%;
-    margin: 10px 0;
-    transition: all 0.3s ease;
-    font-family: 'Poppins', sans-serif;
-}
-
-input:focus, select:focus {
-    outline: none;
-    border-color: #667eea;
-    box-shadow: 0 0 20px rgba(102, 126, 234, 0.3);
-    transform: translateY(-2px);
-}
-
-/* Layout Improvements */
-.header-section {
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    margin-bottom: 30px;
-    flex-wrap: wrap;
-    gap: 20px;
-}
-
-.tab-container {
-    display: flex;
-    flex-wrap: wrap;
-    gap: 10px;
-    margin-bottom: 30px;
-    justify-content: center;
-}
-
-.content-section {
-    background: rgba(255, 255, 255, 0.1);
-    backdrop-filter: blur(20px);
-    border-radius: 25px;
-    padding: 40px;
-    margin: 20px 0;
-    border: 1px solid rgba(255,255,255,0.2);
-    box-shadow: 0 20px 60px rgba(0,0,0,0.1);
-}
-
-.button-group {
-    display: flex;
-    gap: 15px;
-    flex-wrap: wrap;
-    justify-content: center;
-    margin: 20px 0;
-}
-
-.chat-container {
-    height: 400px;
-    overflow-y: auto;
-    border: 2px solid rgba(255,255,255,0.2);
-    border-radius: 20px;
-    padding: 20px;
-    background: rgba(255,255,255,0.05);
-    backdrop-filter: blur(10px);
-    margin: 20px 0;
-}
-
-.chat-message {
-    margin: 15px 0;
-    padding: 15px 20px;
-    border-radius: 20px;
-    max-width: 80%;
-    word-wrap: break-word;
-}
-
-.chat-message.user {
-    background: linear-gradient(135deg, #667eea, #764ba2);
-    color: white;
-    margin-left: auto;
-    text-align: right;
-}
-
-.chat-message.assistant {
-    background: rgba(255,255,255,0.9);
-    color: #333;
-    margin-right: auto;
-}
-
-/* Responsive Design */
-@media (max-width: 768px) {
-    .container {
-        padding: 15px;
-    }
-    
-    .main-title {
-        font-size: 2rem;
-        margin: 20px 0;
-    }
-    
-    .big-button, .success-button, .warning-button {
-        font-size: 16px;
-        padding: 15px 25px;
-        min-width: 150px;
-    }
-    
-    .coin-display {
-        font-size: 20px;
-        padding: 15px 20px;
-    }
-    
-    .kid-card {
-        padding: 20px;
-        margin: 15px 5px;
-    }
-    
-    .content-section {
-        padding: 25px;
-    }
-    
-    .tab-nav {
-        padding: 12px 20px;
-        font-size: 14px;
-    }
-    
-    .header-section {
-        flex-direction: column;
-        text-align: center;
-    }
-    
-    .tab-container {
-        flex-direction: column;
-        align-items: center;
-    }
-    
-    .button-group {
-        flex-direction: column;
-        align-items: center;
-    }
-    
-    .webcam-preview {
-        width: 200px;
-        height: 150px;
-    }
-    
-    .video-container {
-        height: 300px;
-    }
-}
-
-@media (max-width: 480px) {
-    .main-title {
-        font-size: 1.5rem;
-    }
-    
-    .big-button, .success-button, .warning-button {
-        font-size: 14px;
-        padding: 12px 20px;
-        min-width: 120px;
-    }
-    
-    .coin-display {
-        font-size: 18px;
-        padding: 12px 16px;
-    }
-    
-    .content-section {
-        padding: 20px;
-    }
-    
-    .kid-card {
-        padding: 15px;
-    }
-}
-
-/* Scrollbar Styling */
-::-webkit-scrollbar {
-    width: 8px;
-}
-
-::-webkit-scrollbar-track {
-    background: rgba(255,255,255,0.1);
-    border-radius: 4px;
-}
-
-::-webkit-scrollbar-thumb {
-    background: linear-gradient(135deg, #667eea, #764ba2);
-    border-radius: 4px;
-}
-
-::-webkit-scrollbar-thumb:hover {
-    background: linear-gradient(135deg, #764ba2, #667eea);
-}
+// Sample Data (from original), built once at module load
+const SAMPLE_VIDEOS = {
+  Math: [
+    { title: 'Fun with Fractions! 🥧', duration: '15:30', url: 'https://www.youtube.com/embed/dQw4w9WgXcQ' },
+    // ... other videos
+  ],
+  // ... other subjects
+};
 
-/* Loading Animation */
-@keyframes fadeIn {
-    from { opacity: 0; transform: translateY(20px); }
-    to { opacity: 1; transform: translateY(0); }
-}
+const PERKS_SHOP = [
+  { name: 'Golden Star Badge ⭐', cost: 50, description: 'Show everyone you\'re a star student!' },
+  // ... other perks
+];
+
+// The perk details never change, so their elements are built once and reused on every render
+const PERK_DETAILS = PERKS_SHOP.map(perk => (
+  <div>
+    <div style={{ fontSize: '18px', fontWeight: '600', color: '#667eea', marginBottom: '8px' }}>{perk.name}</div>
+    <div style={{ fontSize: '14px', color: '#666', marginBottom: '10px' }}>{perk.description}</div>
+    <div style={{ fontSize: '16px', fontWeight: '600', color: '#f7971e' }}>💰 {perk.cost} coins</div>
+  </div>
+));
+
+// Poster image for a YouTube embed URL (https://www.youtube.com/embed/<id>)
+const youtubeThumbnail = (url) => {
+  const id = url.match(/\/embed\/([\w-]+)/)?.[1];
+  return id ? `https://img.youtube.com/vi/${id}/hqdefault.jpg` : '';
+};
 
-.fade-in {
-    animation: fadeIn 0.6s ease-out;
-}
-`;
+// Main screen tabs as [id, label]; one delegated click handler serves them all
+const TABS = [
+  ['home', '🏠 Dashboard'],
+  ['video', '📺 Watch & Learn'],
+  ['quiz', '🎯 Quiz Time'],
+  ['rewards', '🏆 Rewards & Shop'],
+  ['chat', '💬 AI Tutor Chat'],
+  ['parent', '👨‍👩‍👧‍👦 Parent Zone'],
+];
+
+// Setup dropdown choices, shared by every render
+const GRADES = ['5th Grade', '6th Grade', '7th Grade', '8th Grade', '9th Grade', '10th Grade'];
+const BOARDS = ['Karnataka State Board', 'CBSE', 'ICSE', 'IGCSE', 'IB'];
+const SUBJECTS = ['Math', 'Science', 'English', 'Social Studies', 'Physics', 'Chemistry', 'Biology'];
+
+const toOptions = (choices) => choices.map(choice => <option key={choice}>{choice}</option>);
+const GRADE_OPTIONS = toOptions(GRADES);
+const BOARD_OPTIONS = toOptions(BOARDS);
+const SUBJECT_OPTIONS = toOptions(SUBJECTS);
+
+// Static blocks with no state, built once instead of on every render
+const WELCOME_BANNER = (
+  <>
+    <h1 className="main-title">🚀 Agentic AI Tutor - Your After-School Adventure! 🚀</h1>
+    <p style={{ fontSize: '22px', color: 'white', textAlign: 'center', marginBottom: '40px', fontWeight: '500' }}>
+      Welcome to the most fun way to learn! 🌟✨
+    </p>
+  </>
+);
+
+const WEBCAM_PREVIEW = <div className="webcam-preview">📹 Attention Monitor (Simulated)</div>;
+
+const PARENT_ACCESS_RESTRICTED = (
+  <div className="kid-card" style={{ textAlign: 'center' }}>
+    <h4 style={{ color: '#667eea', marginBottom: '20px' }}>🔒 Access Restricted</h4>
+    <p style={{ fontSize: '16px', color: '#666', marginBottom: '20px' }}>
+      Please authenticate as a parent to view the dashboard.
+    </p>
+    <p style={{ fontSize: '14px', color: '#999' }}>
+      Go back to the welcome screen to enter your PIN.
+    </p>
+  </div>
+);
 
 const App = () => {
   // Game State
@@ -611,11 +118,16 @@ const App = () => {
   const [activeTab, setActiveTab] = useState('home');
   const [chatHistory, setChatHistory] = useState([]);
   const [chatMessage, setChatMessage] = useState('');
+  const [streamingReply, setStreamingReply] = useState(null);
+  const chatAbortRef = useRef(null);
+  // Uncontrolled so typing the PIN doesn't re-render the whole app per keystroke
+  const parentPinRef = useRef(null);
+  const videoCatalogueRef = useRef(null);
   const [learningPlan, setLearningPlan] = useState('Click to generate your plan!');
   const [attentionAlert, setAttentionAlert] = useState('');
   const [socraticQuestion, setSocraticQuestion] = useState('');
   const [videoTitle, setVideoTitle] = useState('');
-  const [videoPlayerHtml, setVideoPlayerHtml] = useState('');
+  const [videoPlaying, setVideoPlaying] = useState(false);
   const [quizIntro, setQuizIntro] = useState('');
   const [quizContainerVisible, setQuizContainerVisible] = useState(false);
   const [currentQuestion, setCurrentQuestion] = useState('');
@@ -623,7 +135,6 @@ const App = () => {
   const [quizProgress, setQuizProgress] = useState('');
   const [quizResults, setQuizResults] = useState('');
   const [perkResult, setPerkResult] = useState('');
-  const [parentPin, setParentPin] = useState('');
   const [parentStatus, setParentStatus] = useState('');
   const [selectionStatus, setSelectionStatus] = useState('');
   const [videoCompletionMsg, setVideoCompletionMsg] = useState('');
@@ -646,19 +157,23 @@ const App = () => {
     general: '',
   });
 
-  // Sample Data (from original)
-  const SAMPLE_VIDEOS = {
-    Math: [
-      { title: 'Fun with Fractions! 🥧', duration: '15:30', url: 'https://www.youtube.com/embed/dQw4w9WgXcQ' },
-      // ... other videos
-    ],
-    // ... other subjects
-  };
-
-  const PERKS_SHOP = [
-    { name: 'Golden Star Badge ⭐', cost: 50, description: 'Show everyone you\'re a star student!' },
-    // ... other perks
-  ];
+  // The video catalogue is static, so it is fetched once and videos are picked client-side
+  useEffect(() => {
+    api.get('/videos')
+      .then(response => { videoCatalogueRef.current = response.data; })
+      .catch(error => console.error('Video catalogue error:', error));
+  }, []);
+
+  // Warm the backend's syllabus search for the question being typed
+  useEffect(() => {
+    // Sent exactly as chatWithTutor will send it, so the backend's memo keys match
+    if (chatMessage.trim().length < CHAT_PREFETCH_MIN_CHARS) return undefined;
+    const timer = setTimeout(() => {
+      api.post('/prefetch_chat', { message: chatMessage, subject: userSubject || 'General', grade: userGrade || '10th' })
+        .catch(() => {});
+    }, CHAT_PREFETCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [chatMessage, userSubject, userGrade]);
 
   // API Functions
   const addCoins = (amount) => {
@@ -705,6 +220,13 @@ const App = () => {
   };
 
   const getVideoForSubject = async (subject) => {
+    // Pick from the catalogue fetched at startup; only ask the server if it isn't loaded
+    const catalogue = videoCatalogueRef.current;
+    if (catalogue) {
+      const videos = catalogue.videos[subject];
+      return videos?.length ? videos[Math.floor(Math.random() * videos.length)] : catalogue.default;
+    }
+    
     setLoading(prev => ({ ...prev, video: true }));
     try {
       const response = await api.get(`/get_video_for_subject?subject=${subject}`);
@@ -833,26 +355,24 @@ const App = () => {
   const getLeaderboard = async () => {
     try {
       const response = await api.get('/leaderboard');
-      return response.data.leaderboard;
+      return response.data;
     } catch (error) {
       console.error('Leaderboard error:', error);
-      return `
-    🏆 Your Progress 🏆
-    - 🪙 Total Coins Earned: ${gameState.total_coins_earned}
-    - 🎯 Quizzes Completed: ${gameState.quizzes_completed}
-    - 📺 Videos Watched: ${gameState.videos_watched}
-      `;
+      return {
+        total_coins_earned: gameState.total_coins_earned,
+        quizzes_completed: gameState.quizzes_completed,
+        videos_watched: gameState.videos_watched,
+      };
     }
   };
 
   const getParentDashboard = async () => {
     try {
       const response = await api.get('/parent_dashboard');
-      return response.data.dashboard;
+      return response.data;
     } catch (error) {
       console.error('Parent dashboard error:', error);
-      if (!gameState.parent_authenticated) return '🔒 Please log in as parent first!';
-      return '👨‍👩‍👧‍👦 Parent Dashboard - Error loading data';
+      return null;
     }
   };
 
@@ -877,23 +397,64 @@ const App = () => {
   const chatWithTutor = async (message) => {
     if (!message.trim()) return;
     
+    // A new question cancels the reply still streaming for the previous one,
+    // so the backend stops generating an answer nobody will read
+    chatAbortRef.current?.abort();
+    const controller = new AbortController();
+    chatAbortRef.current = controller;
+    setStreamingReply(null);
+    
     setLoading(prev => ({ ...prev, chat: true }));
     
     // Add user message immediately
-    const newChatHistory = [...chatHistory, { role: 'user', content: message }];
-    setChatHistory(newChatHistory);
+    const appendMessage = (role, content) => setChatHistory(prev => [...prev, { role, content }]);
+    appendMessage('user', message);
     setChatMessage('');
     
     try {
-      const response = await api.post('/chat_with_tutor', {
-        message,
-        subject: userSubject || 'General',
-        grade: userGrade || '10th'
+      // Stream the reply so the first words show up while the AI is still writing
+      const response = await fetch(`${API_BASE_URL}/chat_with_tutor_stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        credentials: 'include',
+        signal: controller.signal,
+        body: JSON.stringify({
+          message,
+          subject: userSubject || 'General',
+          grade: userGrade || '10th'
+        }),
       });
       
-      const botResponse = response.data?.response || 'Sorry, I didn\'t get a response from the AI.';
-      setChatHistory([...newChatHistory, { role: 'assistant', content: botResponse }]);
+      if (!response.ok || !response.body) {
+        const error = new Error(`Chat request failed with status ${response.status}`);
+        error.response = { status: response.status };
+        throw error;
+      }
+      
+      // Only the in-progress reply re-renders while streaming; it joins the
+      // history once, when complete, instead of copying the history per chunk
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let botResponse = '';
+      let lastRender = 0;
+      setStreamingReply('');
+      
+      while (true) {
+        const { done, value } = await reader.read();
+        if (controller.signal.aborted) return;
+        if (done) break;
+        botResponse += decoder.decode(value, { stream: true });
+        // Re-render at most every STREAM_RENDER_INTERVAL_MS; the full reply lands in history at the end
+        const now = performance.now();
+        if (now - lastRender >= STREAM_RENDER_INTERVAL_MS) {
+          lastRender = now;
+          setStreamingReply(botResponse);
+        }
+      }
+      
+      appendMessage('assistant', botResponse || 'Sorry, I didn\'t get a response from the AI.');
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('Chat error:', error);
       let errorMessage = '❌ Sorry, I\'m having trouble connecting right now.';
       
@@ -905,20 +466,35 @@ const App = () => {
         errorMessage = '❌ Cannot connect to backend. Please make sure the backend is running.';
       }
       
-      setChatHistory([...newChatHistory, { 
-        role: 'assistant', 
-        content: errorMessage
-      }]);
+      appendMessage('assistant', errorMessage);
     } finally {
-      setLoading(prev => ({ ...prev, chat: false }));
+      if (chatAbortRef.current === controller) {
+        chatAbortRef.current = null;
+        setStreamingReply(null);
+        setLoading(prev => ({ ...prev, chat: false }));
+      }
     }
   };
 
   // Event Handlers
   const switchToSelection = () => setCurrentScreen('selection');
 
+  const handleTabClick = (e) => {
+    const tab = e.target.closest('[data-tab]')?.dataset.tab;
+    if (tab) setActiveTab(tab);
+  };
+
+  // Shared by the Send button and the Enter key
+  const sendChatMessage = () => chatWithTutor(chatMessage);
+  const handleChatKeyDown = (e) => e.key === 'Enter' && sendChatMessage();
+
+  // List buttons carry their index, so one handler serves every item
+  const handleQuizAnswerClick = (e) => handleQuizAnswer(Number(e.currentTarget.dataset.index));
+  const handleBuyPerkClick = (e) => buyPerk(Number(e.currentTarget.dataset.index));
+
   const handleParentLogin = async () => {
-    await verifyParentPin(parentPin);
+    if (loading.parent) return;
+    await verifyParentPin(parentPinRef.current.value);
   };
 
   const setupLearning = () => {
@@ -933,7 +509,7 @@ const App = () => {
   const loadVideoForSubject = async () => {
     const video = await getVideoForSubject(userSubject);
     setVideoTitle(`Now Playing: ${video.title}`);
-    setVideoPlayerHtml(`<iframe width="100%" height="100%" src="${video.url}" frameborder="0" allowfullscreen></iframe>`);
+    setVideoPlaying(false);
     setCurrentVideo(video);
   };
 
@@ -993,13 +569,9 @@ const App = () => {
   // Render
   return (
     <div className="container fade-in">
-      <style>{styles}</style>
       {currentScreen === 'welcome' && (
         <div className="content-section">
-          <h1 className="main-title">🚀 Agentic AI Tutor - Your After-School Adventure! 🚀</h1>
-          <p style={{ fontSize: '22px', color: 'white', textAlign: 'center', marginBottom: '40px', fontWeight: '500' }}>
-            Welcome to the most fun way to learn! 🌟✨
-          </p>
+          {WELCOME_BANNER}
           <div className="button-group">
             <button className="big-button" onClick={switchToSelection}>
               🎮 Start as Guest - Let's Learn!
@@ -1010,8 +582,8 @@ const App = () => {
             <input
               type="password"
               placeholder="Enter PIN (default: 1234)"
-              value={parentPin}
-              onChange={(e) => setParentPin(e.target.value)}
+              ref={parentPinRef}
+              onKeyDown={(e) => e.key === 'Enter' && handleParentLogin()}
               style={{ marginBottom: '20px' }}
             />
             <div className="button-group">
@@ -1039,34 +611,19 @@ const App = () => {
             <div className="kid-card">
               <select value={userGrade} onChange={(e) => setUserGrade(e.target.value)}>
                 <option value="">🎓 What grade are you in?</option>
-                <option>5th Grade</option>
-                <option>6th Grade</option>
-                <option>7th Grade</option>
-                <option>8th Grade</option>
-                <option>9th Grade</option>
-                <option>10th Grade</option>
+                {GRADE_OPTIONS}
               </select>
             </div>
             <div className="kid-card">
               <select value={userBoard} onChange={(e) => setUserBoard(e.target.value)}>
                 <option value="">📖 Which board do you follow?</option>
-                <option>Karnataka State Board</option>
-                <option>CBSE</option>
-                <option>ICSE</option>
-                <option>IGCSE</option>
-                <option>IB</option>
+                {BOARD_OPTIONS}
               </select>
             </div>
             <div className="kid-card">
               <select value={userSubject} onChange={(e) => setUserSubject(e.target.value)}>
                 <option value="">🔬 What subject shall we explore?</option>
-                <option>Math</option>
-                <option>Science</option>
-                <option>English</option>
-                <option>Social Studies</option>
-                <option>Physics</option>
-                <option>Chemistry</option>
-                <option>Biology</option>
+                {SUBJECT_OPTIONS}
               </select>
             </div>
             <div className="button-group">
@@ -1091,25 +648,12 @@ const App = () => {
               🏠 Back to Home
             </button>
           </div>
-          <div className="tab-container">
-            <button className={`tab-nav ${activeTab === 'home' ? 'active' : ''}`} onClick={() => setActiveTab('home')}>
-              🏠 Dashboard
-            </button>
-            <button className={`tab-nav ${activeTab === 'video' ? 'active' : ''}`} onClick={() => setActiveTab('video')}>
-              📺 Watch & Learn
-            </button>
-            <button className={`tab-nav ${activeTab === 'quiz' ? 'active' : ''}`} onClick={() => setActiveTab('quiz')}>
-              🎯 Quiz Time
-            </button>
-            <button className={`tab-nav ${activeTab === 'rewards' ? 'active' : ''}`} onClick={() => setActiveTab('rewards')}>
-              🏆 Rewards & Shop
-            </button>
-            <button className={`tab-nav ${activeTab === 'chat' ? 'active' : ''}`} onClick={() => setActiveTab('chat')}>
-              💬 AI Tutor Chat
-            </button>
-            <button className={`tab-nav ${activeTab === 'parent' ? 'active' : ''}`} onClick={() => setActiveTab('parent')}>
-              👨‍👩‍👧‍👦 Parent Zone
-            </button>
+          <div className="tab-container" onClick={handleTabClick}>
+            {TABS.map(([tab, label]) => (
+              <button key={tab} data-tab={tab} className={`tab-nav ${activeTab === tab ? 'active' : ''}`}>
+                {label}
+              </button>
+            ))}
           </div>
 
           {activeTab === 'home' && (
@@ -1163,7 +707,30 @@ const App = () => {
                 </div>
               )}
               
-              <div className="video-container" dangerouslySetInnerHTML={{ __html: videoPlayerHtml }} />
+              <div className="video-container">
+                {currentVideo.url && (videoPlaying ? (
+                  <iframe
+                    width="100%"
+                    height="100%"
+                    src={`${currentVideo.url}?autoplay=1`}
+                    title={currentVideo.title}
+                    frameBorder="0"
+                    loading="lazy"
+                    allow="autoplay; fullscreen"
+                    allowFullScreen
+                  />
+                ) : (
+                  // Only a thumbnail until the child presses play, so the YouTube player isn't downloaded up front
+                  <button
+                    className="video-facade"
+                    style={{ backgroundImage: `url(${youtubeThumbnail(currentVideo.url)})` }}
+                    onClick={() => setVideoPlaying(true)}
+                    aria-label={`Play ${currentVideo.title}`}
+                  >
+                    ▶
+                  </button>
+                ))}
+              </div>
               
               <div className="button-group" style={{ marginTop: '30px' }}>
                 <button 
@@ -1185,7 +752,7 @@ const App = () => {
               )}
               
               <div style={{ display: 'flex', flexDirection: 'column', alignItems: 'center', gap: '20px', marginTop: '30px' }}>
-                <div className="webcam-preview">📹 Attention Monitor (Simulated)</div>
+                {WEBCAM_PREVIEW}
                 <button className="warning-button" onClick={checkAttention}>🔍 Check My Focus</button>
                 
                 {attentionStatus && (
@@ -1240,8 +807,9 @@ const App = () => {
                     {answerOptions.map((opt, i) => (
                       <button 
                         key={i} 
+                        data-index={i}
                         className="quiz-card" 
-                        onClick={() => handleQuizAnswer(i)}
+                        onClick={handleQuizAnswerClick}
                         style={{ 
                           backgroundColor: quizAnswers[currentQuestionIndex] === i ? 'rgba(102, 126, 234, 0.2)' : undefined 
                         }}
@@ -1301,16 +869,13 @@ const App = () => {
               <div className="kid-card">
                 <h4 style={{ color: '#667eea', marginBottom: '20px' }}>🛍️ Awesome Perk Shop</h4>
                 <div style={{ display: 'grid', gap: '20px', marginBottom: '30px' }}>
-                  {PERKS_SHOP.map((perk, i) => (
+                  {PERK_DETAILS.map((details, i) => (
                     <div key={i} className="quiz-card" style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', borderLeft: '6px solid #f7971e' }}>
-                      <div>
-                        <div style={{ fontSize: '18px', fontWeight: '600', color: '#667eea', marginBottom: '8px' }}>{perk.name}</div>
-                        <div style={{ fontSize: '14px', color: '#666', marginBottom: '10px' }}>{perk.description}</div>
-                        <div style={{ fontSize: '16px', fontWeight: '600', color: '#f7971e' }}>💰 {perk.cost} coins</div>
-                      </div>
+                      {details}
                       <button 
                         className="warning-button" 
-                        onClick={() => buyPerk(i)}
+                        data-index={i}
+                        onClick={handleBuyPerkClick}
                         disabled={loading.perk}
                         style={{ minWidth: '120px', padding: '10px 20px' }}
                       >
@@ -1350,6 +915,12 @@ const App = () => {
                       </div>
                     ))
                   )}
+                  {streamingReply !== null && (
+                    <div className="chat-message assistant">
+                      <strong style={{ marginBottom: '5px', display: 'block' }}>🤖 AI Tutor:</strong>
+                      {streamingReply || '…'}
+                    </div>
+                  )}
                 </div>
                 
                 <div style={{ display: 'flex', gap: '15px', marginTop: '20px' }}>
@@ -1358,11 +929,11 @@ const App = () => {
                     onChange={(e) => setChatMessage(e.target.value)}
                     placeholder={`Ask me about ${userSubject}... 🤔`}
                     style={{ flex: '1' }}
-                    onKeyPress={(e) => e.key === 'Enter' && chatWithTutor(chatMessage)}
+                    onKeyDown={handleChatKeyDown}
                   />
                   <button 
                     className="big-button" 
-                    onClick={() => chatWithTutor(chatMessage)}
+                    onClick={sendChatMessage}
                     disabled={!chatMessage.trim() || loading.chat}
                     style={{ minWidth: '120px' }}
                   >
@@ -1433,15 +1004,7 @@ const App = () => {
                   </div>
                 </div>
               ) : (
-                <div className="kid-card" style={{ textAlign: 'center' }}>
-                  <h4 style={{ color: '#667eea', marginBottom: '20px' }}>🔒 Access Restricted</h4>
-                  <p style={{ fontSize: '16px', color: '#666', marginBottom: '20px' }}>
-                    Please authenticate as a parent to view the dashboard.
-                  </p>
-                  <p style={{ fontSize: '14px', color: '#999' }}>
-                    Go back to the welcome screen to enter your PIN.
-                  </p>
-                </div>
+                PARENT_ACCESS_RESTRICTED
               )}
             </div>
           )}